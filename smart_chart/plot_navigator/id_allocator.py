@@ -0,0 +1,34 @@
+import heapq
+
+
+# hands out the smallest free positive integer id. released ids go to a min-heap and ids that were never
+# used are counted up, so allocating and releasing are O(log n) instead of scanning 1,2,3,... for a gap.
+# classes that share an id space share one allocator
+class IdAllocator:
+    def __init__(self):
+        self.next_id = 1
+        self.free_ids = []
+        self.used_ids = set()
+
+    def allocate(self):
+        if self.free_ids:
+            id = heapq.heappop(self.free_ids)
+        else:
+            id = self.next_id
+            self.next_id += 1
+        self.used_ids.add(id)
+        return id
+
+    # give the id back, returns False if it is not in use, so releasing twice does not corrupt the heap
+    def release(self, id):
+        if id not in self.used_ids:
+            return False
+        self.used_ids.remove(id)
+        heapq.heappush(self.free_ids, id)
+        return True
+
+    def __contains__(self, id):
+        return id in self.used_ids
+
+    def __len__(self):
+        return len(self.used_ids)
@@ -1,9 +1,11 @@
 from __future__ import annotations
-from PySide6.QtCharts import QChartView, QChart, QLineSeries, QValueAxis,QScatterSeries
-from PySide6.QtGui import QPainter, QPen, QColor, QBrush, QPolygonF, QPolygon
+from PySide6.QtCharts import QChartView, QChart, QLineSeries, QValueAxis,QScatterSeries, QAbstractAxis
+from PySide6.QtGui import QPainter, QPen, QColor, QBrush, QPolygonF, QPolygon, QTransform
 from PySide6.QtCore import QPointF, QRectF, Qt, QLineF, QSizeF, QRect
-from PySide6.QtWidgets import QGraphicsTextItem,QGraphicsSimpleTextItem
+from PySide6.QtWidgets import QGraphicsTextItem,QGraphicsSimpleTextItem, QGraphicsItem
 import math
+import numpy as np
+from .id_allocator import IdAllocator
 
 class Measure:
     # Measure is a base class that defines what a measure in the QChartView is
@@ -39,7 +41,7 @@ class Measure:
     
 class MeasureMarker(QLineSeries):
     isinstance_count = 0
-    id_pool = set()
+    id_allocator = IdAllocator()
     # MeasureMarker is a QLineSeries that is used to draw the measure line
     # it is a child class of QLineSeries
     def __init__(self, chart_view:QChartView,measure:Measure):
@@ -70,14 +72,8 @@ class MeasureMarker(QLineSeries):
         MeasureMarker.isinstance_count += 1
         
     def setupID(self):
-        # assign an id and try from 1,2,3,4,5... until an id is not in the id_pool
-        id = 1
-        while True:
-            if id not in MeasureMarker.id_pool:
-                MeasureMarker.id_pool.add(id)
-                break
-            id = id + 1
-        self.id = id
+        # assign the smallest free id
+        self.id = MeasureMarker.id_allocator.allocate()
     
     def checkCompleteStatus(self):
         if self.measure.left_point != None and self.measure.right_point != None:
@@ -91,7 +87,7 @@ class MeasureMarker(QLineSeries):
        # whichever point is set first is point1, else point2
         if self.point1 is None:
             self.point1 = point
-            self.point1_marker = PointMarker(self.chart_view,point.x(),point.y())
+            self.point1_marker = self.chart_view.point_marker_pool.acquire(point.x(),point.y())
             if self.point1 is not None and self.point2 is not None:
                 self.measure.setReferencePoints(self.point1, self.point2)
                 self.clearPoint()
@@ -100,7 +96,7 @@ class MeasureMarker(QLineSeries):
                 return False
         elif self.point2 is None:
             self.point2 = point
-            self.point2_marker = PointMarker(self.chart_view,point.x(),point.y())
+            self.point2_marker = self.chart_view.point_marker_pool.acquire(point.x(),point.y())
             if self.point1 is not None and self.point2 is not None:
                 self.measure.setReferencePoints(self.point1, self.point2)
                 self.clearPoint()
@@ -125,8 +121,8 @@ class MeasureMarker(QLineSeries):
         if self.measure.left_point is None or self.measure.right_point is None:
             return
         else:
-            self.point1_marker = PointMarker(self.chart_view,self.measure.left_point.x(),self.measure.left_point.y())
-            self.point2_marker = PointMarker(self.chart_view,self.measure.right_point.x(),self.measure.right_point.y())
+            self.point1_marker = self.chart_view.point_marker_pool.acquire(self.measure.left_point.x(),self.measure.left_point.y())
+            self.point2_marker = self.chart_view.point_marker_pool.acquire(self.measure.right_point.x(),self.measure.right_point.y())
             if self.measure.left_point.y() > self.measure.right_point.y():  
                 self.measure_line = QLineF(self.measure.left_point.x(), self.measure.left_point.y(), self.measure.left_point.x(), self.measure.right_point.y())
             else:
@@ -134,6 +130,7 @@ class MeasureMarker(QLineSeries):
             self.clear()
             self.append(self.measure_line.p1())
             self.append(self.measure_line.p2())
+            self.chart_view.hit_index.invalidate("measure")
 
             if self.measure.left_point.y() > self.measure.right_point.y():  
             # add horizontal aux line marker
@@ -160,8 +157,8 @@ class MeasureMarker(QLineSeries):
         if self.measure.left_point is None or self.measure.right_point is None:
             return
         else:
-            self.point1_marker = PointMarker(self.chart_view,self.measure.left_point.x(),self.measure.left_point.y())
-            self.point2_marker = PointMarker(self.chart_view,self.measure.right_point.x(),self.measure.right_point.y())
+            self.point1_marker = self.chart_view.point_marker_pool.acquire(self.measure.left_point.x(),self.measure.left_point.y())
+            self.point2_marker = self.chart_view.point_marker_pool.acquire(self.measure.right_point.x(),self.measure.right_point.y())
             if self.measure.left_point.y() > self.measure.right_point.y():  
                 self.measure_line = QLineF(self.measure.left_point.x(), self.measure.left_point.y(), self.measure.right_point.x(), self.measure.left_point.y())
             else:
@@ -169,6 +166,7 @@ class MeasureMarker(QLineSeries):
             self.clear()
             self.append(self.measure_line.p1())
             self.append(self.measure_line.p2())
+            self.chart_view.hit_index.invalidate("measure")
 
             self.valm1 = VerticalAuxLineMarker(self.chart_view, self.measure.left_point.x(),self.measure_line.p1().y(),mode="measure")
             self.valm2 = VerticalAuxLineMarker(self.chart_view, self.measure.right_point.x(),self.measure_line.p1().y(),mode="measure")
@@ -186,12 +184,13 @@ class MeasureMarker(QLineSeries):
         if self.measure.left_point is None or self.measure.right_point is None:
             return
         else:
-            self.point1_marker = PointMarker(self.chart_view,self.measure.left_point.x(),self.measure.left_point.y())
-            self.point2_marker = PointMarker(self.chart_view,self.measure.right_point.x(),self.measure.right_point.y())
+            self.point1_marker = self.chart_view.point_marker_pool.acquire(self.measure.left_point.x(),self.measure.left_point.y())
+            self.point2_marker = self.chart_view.point_marker_pool.acquire(self.measure.right_point.x(),self.measure.right_point.y())
             self.measure_line = QLineF(self.measure.left_point, self.measure.right_point)
             self.clear()
             self.append(self.measure_line.p1())
             self.append(self.measure_line.p2())
+            self.chart_view.hit_index.invalidate("measure")
 
             # add text item above the marker
             self.text_item = QGraphicsTextItem()
@@ -214,6 +213,7 @@ class MeasureMarker(QLineSeries):
     def clearMeasureLine(self):
         self.clear()
         self.measure_line = None
+        self.chart_view.hit_index.invalidate("measure")
         if self.text_item is not None:
             self.chart_view.scene().removeItem(self.text_item)
         self.text_item = None
@@ -227,23 +227,20 @@ class MeasureMarker(QLineSeries):
         point_marker = [self.point1_marker,self.point2_marker]
         for marker in point_marker:
             if marker is not None:
+                # clearMarker hands the point marker back to the pool
                 marker.clearMarker()
-                marker.__class__.isinstance_count -= 1
-                marker.__class__.id_pool.remove(marker.id)
                 del marker
         self.point1_marker,self.point2_marker = None,None
 
     def _convertPointFromChartViewtoViewPort(self, point:QPointF):
-        point = self.chart_view.chart().mapToPosition(point)
-        point_in_scene = self.chart_view.mapToScene(point.toPoint())
-        point_viewport_position = self.chart_view.mapFromScene(point_in_scene)
-        return point_viewport_position
+        return self.chart_view.chart_transform.mapPointToViewport(point)
 
 
 # horizontal auxiliary line marker class
 class HorizontalAuxLineMarker(QLineSeries):
     isinstance_count = 0
-    id_pool = set()
+    # horizontal and vertical auxiliary lines share one id space
+    id_allocator = IdAllocator()
     def __init__(self, chart_view:QChartView, y_value:float, x1_value:float=None,x2_value:float=None, mode:str="normal"):
         super().__init__()
         self.chart_view = chart_view
@@ -266,26 +263,21 @@ class HorizontalAuxLineMarker(QLineSeries):
         self.intersection_points_copy = []
         self.intersection_points = []
         self.intersection_series = None
+        self.intersection_key = None
         # add the horizontal line with y_value across the current x range of chart
         if self.x1_value != None and self.x2_value != None:
             self.append(QPointF(self.x1_value, self.y_value))
             self.append(QPointF(self.x2_value, self.y_value))
         else:
-            self.append(QPointF(self.chart_view.chart().axisX().min(), self.y_value))
-            self.append(QPointF(self.chart_view.chart().axisX().max(), self.y_value))
-        self.chart_view.addSeriestoXY(self, self.chart_view.x_axis, self.chart_view.y_axis)
+            self.append(QPointF(self.chart_view.x_axis.min(), self.y_value))
+            self.append(QPointF(self.chart_view.x_axis.max(), self.y_value))
+        self.chart_view.marker_overlay.addMarker(self)
         self.show()
 
     def setupID(self):
-        # Both VerticalAuxLineMarker and HorizontalAuxLineMarker share the same id_pool
-        # assign an id and try from 1,2,3,4,5... until an id is not in the id_pool
-        id = 1
-        while True:
-            if id not in HorizontalAuxLineMarker.id_pool and id not in VerticalAuxLineMarker.id_pool:
-                HorizontalAuxLineMarker.id_pool.add(id)
-                break
-            id = id + 1
-        self.id = id
+        # Both VerticalAuxLineMarker and HorizontalAuxLineMarker share the same id_allocator
+        # assign the smallest free id
+        self.id = HorizontalAuxLineMarker.id_allocator.allocate()
     
     def addPointMarker(self,point_marker:PointMarker):
         self.point_marker[point_marker.id] = point_marker
@@ -315,9 +307,9 @@ class HorizontalAuxLineMarker(QLineSeries):
         return True
         
     def clearMarker(self):
-        self.chart_view.chart().removeSeries(self)
+        self.chart_view.marker_overlay.removeMarker(self)
         self.deletePointMarkers()
-        HorizontalAuxLineMarker.id_pool.remove(self.id)
+        HorizontalAuxLineMarker.id_allocator.release(self.id)
         HorizontalAuxLineMarker.isinstance_count -= 1
         return True
     
@@ -333,19 +325,23 @@ class HorizontalAuxLineMarker(QLineSeries):
         # set the position of the ALM to the current y_value
         # if the y_value is out of range, hide the ALM
         self.clear()
-        self.append(QPointF(self.chart_view.chart().axisX().min(), y_value))
-        self.append(QPointF(self.chart_view.chart().axisX().max(), y_value))
+        self.append(QPointF(self.chart_view.x_axis.min(), y_value))
+        self.append(QPointF(self.chart_view.x_axis.max(), y_value))
         self.y_value = y_value
+        self.chart_view.hit_index.invalidate("aux_lines")
+        self.chart_view.marker_overlay.update()
 
     def highlightOn(self, width:float):
         # set the width of the ALM
         pen = self.pen()
         pen.setWidth(width)
         self.setPen(pen)
+        self.chart_view.marker_overlay.update()
     
     def highlightOff(self):
         # set the width of the ALM to 1
         self.setPen(self.pen_backup)
+        self.chart_view.marker_overlay.update()
 
     def backupPen(self):
         self.pen_backup = self.pen()
@@ -353,13 +349,14 @@ class HorizontalAuxLineMarker(QLineSeries):
     def redraw(self):
         # redraw the ALM
         self.clear()
-        self.append(QPointF(self.chart_view.chart().axisX().min(), self.y_value))
-        self.append(QPointF(self.chart_view.chart().axisX().max(), self.y_value))
+        self.append(QPointF(self.chart_view.x_axis.min(), self.y_value))
+        self.append(QPointF(self.chart_view.x_axis.max(), self.y_value))
+        self.chart_view.marker_overlay.update()
 
 # vertical auxiliary line marker class
 class VerticalAuxLineMarker(QLineSeries):
     isinstance_count = 0
-    id_pool = set()
+    id_allocator = HorizontalAuxLineMarker.id_allocator
     def __init__(self, chart_view:QChartView, x_value:float, y_value:float=None,mode:str="normal"):
         super().__init__()
         self.chart_view = chart_view
@@ -380,6 +377,7 @@ class VerticalAuxLineMarker(QLineSeries):
         self.intersection_points_copy = []
         self.intersection_points = []
         self.intersection_series = None
+        self.intersection_key = None
         # add the vertical line with x_value across the current y range of chart
         if self.y_value!=None:
             self.append(QPointF(self.x_value, self.y_value*1.2))
@@ -387,19 +385,13 @@ class VerticalAuxLineMarker(QLineSeries):
         else:
             self.append(QPointF(self.x_value, self.chart_view.y_axis.min()))
             self.append(QPointF(self.x_value, self.chart_view.y_axis.max()))
-        self.chart_view.addSeriestoXY(self, self.chart_view.x_axis, self.chart_view.y_axis)
+        self.chart_view.marker_overlay.addMarker(self)
         self.show()
         
     def setupID(self):
-        # Both VerticalAuxLineMarker and HorizontalAuxLineMarker share the same id_pool
-        # assign an id and try from 1,2,3,4,5... until an id is not in the id_pool
-        id = 1
-        while True:
-            if id not in VerticalAuxLineMarker.id_pool and id not in HorizontalAuxLineMarker.id_pool:
-                VerticalAuxLineMarker.id_pool.add(id)
-                break
-            id = id + 1
-        self.id = id
+        # Both VerticalAuxLineMarker and HorizontalAuxLineMarker share the same id_allocator
+        # assign the smallest free id
+        self.id = VerticalAuxLineMarker.id_allocator.allocate()
 
     def addPointMarker(self,point_marker:PointMarker):
         self.point_marker[point_marker.id] = point_marker
@@ -429,9 +421,9 @@ class VerticalAuxLineMarker(QLineSeries):
         return True
     
     def clearMarker(self):
-        self.chart_view.chart().removeSeries(self)
+        self.chart_view.marker_overlay.removeMarker(self)
         self.deletePointMarkers()
-        VerticalAuxLineMarker.id_pool.remove(self.id)
+        VerticalAuxLineMarker.id_allocator.release(self.id)
         VerticalAuxLineMarker.isinstance_count -= 1
 
         return True
@@ -440,19 +432,23 @@ class VerticalAuxLineMarker(QLineSeries):
         # set the position of the ALM to the current y_value
         # if the y_value is out of range, hide the ALM
         self.clear()
-        self.append(QPointF(x_value, self.chart_view.x_axis.min()))
+        self.append(QPointF(x_value, self.chart_view.y_axis.min()))
         self.append(QPointF(x_value, self.chart_view.y_axis.max()))
         self.x_value = x_value
+        self.chart_view.hit_index.invalidate("aux_lines")
+        self.chart_view.marker_overlay.update()
 
     def highlightOn(self, width:float):
         # set the width of the ALM
         pen = self.pen()
         pen.setWidth(width)
         self.setPen(pen)
+        self.chart_view.marker_overlay.update()
     
     def highlightOff(self):
         # set the width of the ALM to 1
         self.setPen(self.pen_backup)
+        self.chart_view.marker_overlay.update()
 
     def backupPen(self):
         self.pen_backup = self.pen()
@@ -462,11 +458,12 @@ class VerticalAuxLineMarker(QLineSeries):
         self.clear()
         self.append(QPointF(self.x_value, self.chart_view.y_axis.min()))
         self.append(QPointF(self.x_value, self.chart_view.y_axis.max()))
+        self.chart_view.marker_overlay.update()
     
 
 class PointMarker(QScatterSeries):
     isinstance_count = 0
-    id_pool = set()
+    id_allocator = IdAllocator()
     marker_size = 10
     def __init__(self, chart_view:QChartView, x_value:float, y_value:float):
         super().__init__()
@@ -479,35 +476,263 @@ class PointMarker(QScatterSeries):
         self.setMarkerSize(PointMarker.marker_size)
         self.setMarkerShape(QScatterSeries.MarkerShape.MarkerShapeCircle)
         self.setBrush(QBrush(Qt.red))
+        # white border of the default chart theme
+        self.setPen(QPen(Qt.white, 2))
         self.append(QPointF(self.x_value, self.y_value))
-        self.chart_view.addSeriestoXY(self, self.chart_view.x_axis, self.chart_view.y_axis)
 
-        # add point coordinate text label
+        # point coordinate text label, painted next to the point by the marker overlay
         self.point_coordinate_label = QGraphicsSimpleTextItem(f"({self.x_value:.3f},{self.y_value:.3f})")
-        view_point_pos = self._convertPointFromChartViewtoViewPort(QPointF(self.x_value, self.y_value))
-        self.point_coordinate_label.setPos(view_point_pos.x(), view_point_pos.y())
         self.point_coordinate_label.setBrush(QBrush(Qt.red))
-        self.chart_view.scene().addItem(self.point_coordinate_label)
+        # True while the marker waits in the point marker pool of the chart view
+        self.pooled = False
+        self.chart_view.marker_overlay.addMarker(self)
         self.show()
         
     def setupID(self):
-        # assign an id and try from 1,2,3,4,5... until an id is not in the id_pool
-        id = 1
-        while True:
-            if id not in PointMarker.id_pool:
-                PointMarker.id_pool.add(id)
-                break
-            id = id + 1
-        self.id = id
+        # assign the smallest free id
+        self.id = PointMarker.id_allocator.allocate()
     
+    # move the marker and its coordinate label to a new point
+    def setPosition(self, x_value:float, y_value:float):
+        self.x_value = x_value
+        self.y_value = y_value
+        self.replace(0, QPointF(x_value, y_value))
+        self.point_coordinate_label.setText(f"({x_value:.3f},{y_value:.3f})")
+        self.chart_view.marker_overlay.update()
+
+    # hide the marker and hand it back to the pool of the chart view for reuse
     def clearMarker(self):
-        self.chart_view.chart().removeSeries(self)
-        self.chart_view.scene().removeItem(self.point_coordinate_label)
+        return self.chart_view.point_marker_pool.release(self)
+
+    # drop the marker for good when the pool is full
+    def discard(self):
+        self.chart_view.marker_overlay.removeMarker(self)
         self.point_coordinate_label = None
+        # release the id only once if the marker is discarded again
+        if PointMarker.id_allocator.release(self.id):
+            PointMarker.isinstance_count -= 1
         return True
     
     def _convertPointFromChartViewtoViewPort(self, point:QPointF):
-        point = self.chart_view.chart().mapToPosition(point)
-        point_in_scene = self.chart_view.mapToScene(point.toPoint())
-        point_viewport_position = self.chart_view.mapFromScene(point_in_scene)
-        return point_viewport_position
\ No newline at end of file
+        return self.chart_view.chart_transform.mapPointToViewport(point)
+
+
+# per chart view pool of point markers. stepping through intersections or redrawing a measure clears point
+# markers and creates new ones right away, so cleared markers are kept hidden and moved to the next point
+# instead of building a new scatter series and label each time
+class PointMarkerPool:
+    def __init__(self, chart_view:QChartView, max_size:int=256):
+        self.chart_view = chart_view
+        self.max_size = max_size
+        self.free_markers = []
+
+    def acquire(self, x_value:float, y_value:float):
+        if not self.free_markers:
+            return PointMarker(self.chart_view, x_value, y_value)
+        point_marker = self.free_markers.pop()
+        point_marker.pooled = False
+        point_marker.setPosition(x_value, y_value)
+        self.chart_view.marker_overlay.addMarker(point_marker)
+        return point_marker
+
+    def release(self, point_marker:PointMarker):
+        if point_marker.pooled:
+            return False
+        point_marker.pooled = True
+        if len(self.free_markers) >= self.max_size:
+            return point_marker.discard()
+        self.chart_view.marker_overlay.removeMarker(point_marker)
+        self.free_markers.append(point_marker)
+        return True
+
+    def clear(self):
+        while self.free_markers:
+            self.free_markers.pop().discard()
+
+
+# foreground layer that paints every aux line, measure line, point marker and point label of a chart view
+# in one pass. the markers stay QXYSeries holding their points, pen and brush, but they are not added to
+# the chart, so panning does not make qt charts lay out one series per marker
+class MarkerOverlay(QGraphicsItem):
+    def __init__(self, chart_view:QChartView):
+        super().__init__(chart_view.chart())
+        self.chart_view = chart_view
+        # registered markers in drawing order, a dict keeps the order and removes in O(1)
+        self.markers = {}
+        # above the series, below the legend
+        self.setZValue(4.5)
+        self.setAcceptedMouseButtons(Qt.MouseButton.NoButton)
+        self.chart_view.chart().geometryChanged.connect(self.updateGeometry)
+
+    # the overlay repaints when a registered marker is shown or hidden, whoever calls setVisible
+    def addMarker(self, marker:QLineSeries):
+        if marker not in self.markers:
+            self.markers[marker] = None
+            marker.visibleChanged.connect(self.update)
+        self.update()
+
+    def removeMarker(self, marker:QLineSeries):
+        if marker in self.markers:
+            del self.markers[marker]
+            marker.visibleChanged.disconnect(self.update)
+        self.update()
+
+    def updateGeometry(self):
+        self.prepareGeometryChange()
+        self.update()
+
+    def boundingRect(self):
+        return QRectF(QPointF(0, 0), self.chart_view.chart().size())
+
+    # end points of a line marker in values, normal aux lines always span the visible range
+    def _lineEnds(self, marker:QLineSeries):
+        if isinstance(marker, HorizontalAuxLineMarker) and marker.aux_line_mode == "normal":
+            return self.chart_view.x_axis.min(), marker.y_value, self.chart_view.x_axis.max(), marker.y_value
+        if isinstance(marker, VerticalAuxLineMarker) and marker.aux_line_mode == "normal":
+            return marker.x_value, self.chart_view.y_axis.min(), marker.x_value, self.chart_view.y_axis.max()
+        if marker.count() < 2:
+            return None
+        return marker.at(0).x(), marker.at(0).y(), marker.at(1).x(), marker.at(1).y()
+
+    def paint(self, painter:QPainter, option, widget=None):
+        lines = []
+        line_ends = []
+        points = []
+        for marker in self.markers:
+            if not marker.isVisible():
+                continue
+            if isinstance(marker, PointMarker):
+                points.append(marker)
+                continue
+            ends = self._lineEnds(marker)
+            if ends is not None:
+                lines.append(marker)
+                line_ends.append(ends)
+        if not lines and not points:
+            return
+
+        chart_transform = self.chart_view.chart_transform
+        painter.save()
+        painter.setClipRect(self.chart_view.chart().plotArea())
+        if lines:
+            line_ends = np.array(line_ends, dtype=np.float64)
+            x1, y1 = chart_transform.mapToPosition(line_ends[:, 0], line_ends[:, 1])
+            x2, y2 = chart_transform.mapToPosition(line_ends[:, 2], line_ends[:, 3])
+            finite = np.isfinite(x1) & np.isfinite(y1) & np.isfinite(x2) & np.isfinite(y2)
+            for i, marker in enumerate(lines):
+                if finite[i]:
+                    painter.setPen(marker.pen())
+                    painter.drawLine(QLineF(x1[i], y1[i], x2[i], y2[i]))
+
+        if points:
+            x, y = chart_transform.mapToPosition([marker.x_value for marker in points], [marker.y_value for marker in points])
+            finite = np.isfinite(x) & np.isfinite(y)
+            for i, marker in enumerate(points):
+                if finite[i]:
+                    radius = marker.markerSize()/2
+                    painter.setPen(marker.pen())
+                    painter.setBrush(marker.brush())
+                    painter.drawEllipse(QPointF(x[i], y[i]), radius, radius)
+            # the coordinate labels are not clipped to the plot area, like the scene text items they replace
+            painter.setClipping(False)
+            for i, marker in enumerate(points):
+                label = marker.point_coordinate_label
+                if finite[i] and label is not None and label.isVisible():
+                    painter.setFont(label.font())
+                    painter.setPen(QPen(label.brush(), 1))
+                    painter.drawText(QRectF(x[i], y[i], 1000, 100),
+                                     Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop, label.text())
+        painter.restore()
+
+
+# cached map from chart values to chart item and viewport coordinates. each axis maps affinely, in log10
+# space for a log axis, so the whole map is a scale and an offset per axis. it is rebuilt lazily once after
+# the axes, their ranges or the plot area change, and maps whole arrays of values in one vector operation
+# instead of a mapToPosition, mapToScene and mapFromScene call per point
+class ChartTransform:
+    def __init__(self, chart_view:QChartView):
+        self.chart_view = chart_view
+        self.valid = False
+        # counts the rebuilds, so caches in pixels can tell that they are stale
+        self.version = 0
+        # axes whose range changes invalidate the transform
+        self.x_axis = None
+        self.y_axis = None
+        self.x_log = False
+        self.y_log = False
+        self.x_scale, self.x_offset = 1.0, 0.0
+        self.y_scale, self.y_offset = 1.0, 0.0
+        # chart item to viewport, a translation for a chart view that is not scaled or rotated
+        self.view_scale = (1.0, 1.0)
+        self.view_offset = (0.0, 0.0)
+        self.chart_view.chart().plotAreaChanged.connect(self.invalidate)
+
+    def invalidate(self):
+        self.valid = False
+
+    # follow the axes of the chart view, which are replaced when the axis type changes
+    def _watchAxes(self):
+        for name in ("x_axis", "y_axis"):
+            old_axis, axis = getattr(self, name), getattr(self.chart_view, name)
+            if old_axis is axis:
+                continue
+            if old_axis is not None:
+                try:
+                    old_axis.rangeChanged.disconnect(self.invalidate)
+                except (RuntimeError, TypeError):
+                    # the old axis is already deleted
+                    pass
+            axis.rangeChanged.connect(self.invalidate)
+            setattr(self, name, axis)
+            self.valid = False
+
+    @staticmethod
+    def _axisScale(axis:QAbstractAxis, low:float, length:float):
+        log = axis.type() == QAbstractAxis.AxisType.AxisTypeLogValue
+        axis_min, axis_max = axis.min(), axis.max()
+        if log:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                axis_min, axis_max = np.log10(axis_min), np.log10(axis_max)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scale = np.float64(length)/(axis_max - axis_min)
+        return log, float(scale), float(low - axis_min*scale)
+
+    def update(self):
+        self._watchAxes()
+        if self.valid:
+            return
+        plot_area = self.chart_view.chart().plotArea()
+        self.x_log, self.x_scale, self.x_offset = self._axisScale(self.x_axis, plot_area.left(), plot_area.width())
+        # the y axis points up while item coordinates point down
+        self.y_log, self.y_scale, self.y_offset = self._axisScale(self.y_axis, plot_area.bottom(), -plot_area.height())
+        view = self.chart_view.chart().sceneTransform()*self.chart_view.viewportTransform()
+        self.view_scale = (view.m11(), view.m22())
+        self.view_offset = (view.dx(), view.dy())
+        self.version += 1
+        self.valid = True
+
+    # map value arrays to chart item coordinates
+    def mapToPosition(self, x_values, y_values):
+        self.update()
+        x_values = np.asarray(x_values, dtype=np.float64)
+        y_values = np.asarray(y_values, dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if self.x_log:
+                x_values = np.log10(x_values)
+            if self.y_log:
+                y_values = np.log10(y_values)
+        return x_values*self.x_scale + self.x_offset, y_values*self.y_scale + self.y_offset
+
+    # map value arrays to viewport coordinates, where the text items of the markers are placed
+    def mapToViewport(self, x_values, y_values):
+        x, y = self.mapToPosition(x_values, y_values)
+        return x*self.view_scale[0] + self.view_offset[0], y*self.view_scale[1] + self.view_offset[1]
+
+    def mapPointToViewport(self, point:QPointF):
+        x, y = self.mapToViewport(point.x(), point.y())
+        return QPointF(float(x), float(y))
+
+    # painter transform from values to chart item coordinates, for linear axes
+    def valueTransform(self):
+        self.update()
+        return QTransform(self.x_scale, 0, 0, self.y_scale, self.x_offset, self.y_offset)
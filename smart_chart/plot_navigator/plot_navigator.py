@@ -664,10 +664,9 @@ class PlotNavigator(QFrame):
         # for each id in id_list, get the series from self.main_chart_view.series_dict
         for id in id_list:
             series = self.main_chart_view.series_dict[id]       
-            points = series.pointsVector()
-            # get the x and y data from pointsvector
-            x_data = [point.x() for point in points]
-            y_data = [point.y() for point in points]
+            # get the x and y data from the data store of the series
+            x_data = series.series_data.x_data
+            y_data = series.series_data.y_data
             # create a dataframe with the x and y data
             df_temp = pd.DataFrame({f"{series.label} index":range(1,len(x_data)+1),"x":x_data,"y":y_data})
             # concat the dataframe to df
@@ -1,7 +1,7 @@
 # import necessary modules in PySide6
 from PySide6.QtWidgets import QApplication,QMainWindow,QMenu,QFrame,QGridLayout
 from PySide6.QtCharts import QChart, QChartView,QLineSeries
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QAction,QResizeEvent
 from .plot_navigator.plot_navigator import PlotNavigator
 from .smart_chart_view import SmartChartView
@@ -57,6 +57,13 @@ class SmartChart(QFrame):
         # right click on the smart chart to pop up a menu
         self.setContextMenuPolicy(Qt.CustomContextMenu)
         self.customContextMenuRequested.connect(self.showContextMenu)
+
+        # the markers are laid out again once no resize happened for resize_debounce ms,
+        # during a drag the chart views only move their overlay items with the plot area
+        self.resize_debounce = 150
+        self.resize_timer = QTimer(self)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.timeout.connect(self.finishResize)
     
     def showContextMenu(self, pos):
         # if pos is on any chart view, return
@@ -81,14 +88,17 @@ class SmartChart(QFrame):
         self.nav_bar2.setVisible(not self.nav_bar2.isVisible())
 
     def resizeEvent(self, event: QResizeEvent) -> None:
+        self.resize_timer.start(self.resize_debounce)
+        #self.chart_view.adjustYTicks()
+        return super().resizeEvent(event)
+
+    def finishResize(self):
         self.chart_view.updateAuxLineMarker()
         self.chart_view.updateMarkerText()
         self.chart_view.updateAllVLM()
         self.chart_view2.updateAuxLineMarker()
         self.chart_view2.updateMarkerText()
         self.chart_view2.updateAllVLM()
-        #self.chart_view.adjustYTicks()
-        return super().resizeEvent(event)
         
 
 
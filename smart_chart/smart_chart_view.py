@@ -1,12 +1,17 @@
 from __future__ import annotations
 from typing import Union
 from .plot_navigator.plot_navigator import PlotNavigator
-from .plot_navigator.measure import Measure, MeasureMarker, PointMarker, VerticalAuxLineMarker, HorizontalAuxLineMarker
+from .plot_navigator.id_allocator import IdAllocator
+from .plot_navigator.measure import Measure, MeasureMarker, VerticalAuxLineMarker, HorizontalAuxLineMarker, MarkerOverlay, ChartTransform, PointMarkerPool
 from PySide6.QtCharts import QChart, QChartView, QValueAxis, QLineSeries, QScatterSeries, QLogValueAxis, QAbstractAxis
-from PySide6.QtGui import QPainter, QMouseEvent, QWheelEvent, QPen, QAction, QCursor, QFont, QColor
-from PySide6.QtCore import Qt, QPointF
-from PySide6.QtWidgets import QGraphicsEllipseItem, QGraphicsTextItem, QMenu, QColorDialog, QInputDialog
+from PySide6.QtGui import QPainter, QMouseEvent, QWheelEvent, QPen, QAction, QCursor, QFont, QColor, QPainterPath
+from PySide6.QtCore import Qt, QPointF, QTimer, QRectF, QByteArray, QDataStream, Signal
+from PySide6.QtWidgets import QGraphicsEllipseItem, QGraphicsTextItem, QGraphicsItem, QMenu, QColorDialog, QInputDialog
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import math
+import multiprocessing
+import os
 import sys
 import numpy as np
 import time
@@ -23,6 +28,8 @@ class SmartChartView(QChartView):
         self.initGraphicsGroup()
         self.initChart()
         self.updateDefaultRange()
+        self.chart().plotAreaChanged.connect(self.updateSeriesLOD)
+        self.chart().plotAreaChanged.connect(self.translateOverlayItems)
         
     def initGraphicsGroup(self):
         # add a dictionario to store all series for data
@@ -33,10 +40,21 @@ class SmartChartView(QChartView):
         self.measure_marker_dict = {}
         # add a dictionary to store all series for auxilary lines
         self.aux_line_dict = {}
+        # cached value to pixel map shared by the overlay items
+        self.chart_transform = ChartTransform(self)
+        # aux lines, measure lines and point markers are painted by one overlay item
+        self.marker_overlay = MarkerOverlay(self)
+        # hidden point markers kept for reuse
+        self.point_marker_pool = PointMarkerPool(self)
+        # pixel space hit test of the markers under the mouse
+        self.hit_index = MarkerHitIndex(self)
 
         self.active_measure_marker = None
         self.current_measure_type = "p2p"
 
+        # cache of the intersections between auxiliary lines and series
+        self.intersection_cache = IntersectionCache()
+
     # initialize the chart
     def initChart(self):
         # add a default series to self.series_dict
@@ -89,12 +107,118 @@ class SmartChartView(QChartView):
         self.nichols_frequency_data = None
         self.nichols_frequency_series = None
         self.pan_direction = "both"
+        # line series with more points than this are decimated to the plot width
+        self.lod_point_threshold = 20000
+        # the min/max pyramid of a series that opted into it is built in a background thread, series that
+        # samples are appended to rebuild it once appending has been idle for pyramid_idle_delay ms
+        self.pyramid_background = True
+        self.pyramid_idle_delay = 250
+        self.pyramid_timer = QTimer(self)
+        self.pyramid_timer.setSingleShot(True)
+        self.pyramid_timer.timeout.connect(self.rebuildPyramids)
+        # streaming series keep the last stream_capacity samples and are flushed stream_frame_rate times per second
+        self.stream_capacity = 100000
+        self.stream_frame_rate = 30
+        self.stream_autoscale = True
+        self.stream_timer = QTimer(self)
+        self.stream_timer.timeout.connect(self.flushStreamingSeries)
+        # interaction updates are collected and flushed at most once per update_frame_interval ms
+        self.pending_updates = set()
+        self.update_frame_interval = 16
+        self.update_timer = QTimer(self)
+        self.update_timer.setSingleShot(True)
+        self.update_timer.timeout.connect(self.flushUpdates)
+        # series the axes are fitted to with the next frame after appendData
+        self.appended_series = None
+        # while panning or wheel zooming large series are min/max decimated into 1/coarse_render_factor of the
+        # plot width, full detail follows once the input is idle for fine_render_delay ms
+        self.coarse_rendering = False
+        self.coarse_render_factor = 4
+        self.fine_render_delay = 150
+        self.fine_render_timer = QTimer(self)
+        self.fine_render_timer.setSingleShot(True)
+        self.fine_render_timer.timeout.connect(self.finishCoarseRendering)
+        # plot area the overlay items were last laid out for
+        self.last_plot_area = None
+        # markers within hit_tolerance pixels of the mouse are hovered and picked
+        self.hit_tolerance = 8
     
     def updateChartElements(self):
         self.updateSubChart()
         self.updateAuxLineMarker()
         self.updateMarkerText()
 
+    # mark element groups as stale, they are updated together on the next frame.
+    # groups: "data_range", "series_lod", "sub_chart", "aux_lines", "marker_text", "vlm", "chart"
+    def scheduleUpdate(self, *groups: str):
+        self.pending_updates.update(groups)
+        if not self.update_timer.isActive():
+            self.update_timer.start(self.update_frame_interval)
+
+    # draw the series coarse until the continuous navigation stops
+    def startCoarseRendering(self):
+        self.coarse_rendering = True
+        self.fine_render_timer.start(self.fine_render_delay)
+
+    def finishCoarseRendering(self):
+        self.coarse_rendering = False
+        self.updateSeriesLOD()
+
+    # number of decimation columns of the series for the plot width
+    def decimationColumns(self):
+        if self.coarse_rendering:
+            return max(self.plotAreaWidth() // self.coarse_render_factor, 1)
+        return self.plotAreaWidth()
+
+    # text labels and circles placed in chart coordinates on top of the chart, with the point of each item
+    # that marks its position (the center of circles)
+    def overlayItems(self):
+        items = []
+        for mm in self.measure_marker_dict.values():
+            if not mm.text_pos_lock:
+                items.append(mm.text_item)
+        for vlm in self.vertical_marker_dict.values():
+            items.append(vlm.vlm_circle)
+            items.append(vlm.text_item)
+        return [(item, item.boundingRect().center() if isinstance(item, QGraphicsEllipseItem) else QPointF(0, 0))
+                for item in items]
+
+    # move the overlay items with the plot area when it is resized. the value to pixel mapping of both axes is
+    # affine in the plot area, so mapping the old area onto the new one keeps every item on its data point
+    # without interpolating the markers again
+    def translateOverlayItems(self, plot_area: QRectF):
+        old_plot_area = self.last_plot_area
+        self.last_plot_area = QRectF(plot_area)
+        if old_plot_area is None or old_plot_area.isEmpty() or plot_area.isEmpty():
+            return
+        x_scale = plot_area.width() / old_plot_area.width()
+        y_scale = plot_area.height() / old_plot_area.height()
+        for item, anchor in self.overlayItems():
+            point = item.pos() + anchor
+            item.setPos(plot_area.left() + (point.x() - old_plot_area.left())*x_scale - anchor.x(),
+                        plot_area.top() + (point.y() - old_plot_area.top())*y_scale - anchor.y())
+
+    # update every stale element group once
+    def flushUpdates(self):
+        pending = self.pending_updates
+        self.pending_updates = set()
+        # the series are culled again when the range changes
+        if "data_range" in pending:
+            self.updateDataRange()
+        if "series_lod" in pending:
+            self.updateSeriesLOD()
+        if "sub_chart" in pending:
+            self.updateSubChart()
+        if "vlm" in pending:
+            self.updateAllVLM()
+        if "marker_text" in pending:
+            self.updateMarkerText()
+        # updateAuxLineMarker also repaints the chart
+        if "aux_lines" in pending:
+            self.updateAuxLineMarker()
+        elif "chart" in pending:
+            self.chart().update()
+
     def updateDefaultRange(self):
         # update the default range of the axes
         self.default_x_range = (self.x_axis.min(), self.x_axis.max())
@@ -110,27 +234,69 @@ class SmartChartView(QChartView):
             self.chart().legend().markers(series)[0].setVisible(False)
 
     def appendData(self, series: QLineSeries, point_x:float, point_y:float):
-        series.append(QPointF(point_x, point_y))
-        # find the max y of the series
-        max_y = max([point.y() for point in series.pointsVector()])
-        # find the min y of the series
-        min_y = min([point.y() for point in series.pointsVector()])
-        # find the max x of the series
-        max_x = max([point.x() for point in series.pointsVector()])
-        # find the min x of the series
-        min_x = min([point.x() for point in series.pointsVector()])
-        # update the range of the axes
+        # streaming series buffer the samples, they are flushed to Qt once per frame
+        if isinstance(series, SmartStreamingSeries):
+            series.appendData(point_x, point_y)
+            self.startStreaming()
+            return
+        series.addData(point_x, point_y)
+        # the axes follow the bounds of the series, they are updated with the next frame together with
+        # the markers, so appending many samples costs one update per frame
+        self.appended_series = series
+        self.scheduleUpdate("data_range", "aux_lines", "marker_text")
+
+    # fit the axes to the bounds of the series data was last appended to
+    def updateDataRange(self):
+        series = self.appended_series
+        self.appended_series = None
+        if series is None or series.series_data.bounds() is None:
+            return
+        min_x, max_x, min_y, max_y = series.series_data.bounds()
         self.x_axis.setRange(min_x, max_x)
         self.y_axis.setRange(min_y, max_y)
+
+    # start the frame timer that flushes the streaming series
+    def startStreaming(self):
+        if not self.stream_timer.isActive():
+            self.stream_timer.start(int(1000 / self.stream_frame_rate))
+
+    # change the rate at which the streaming series are flushed to Qt
+    def setStreamFrameRate(self, frame_rate: float):
+        self.stream_frame_rate = frame_rate
+        if self.stream_timer.isActive():
+            self.stream_timer.start(int(1000 / self.stream_frame_rate))
+
+    # push the buffered samples of all streaming series to Qt and redraw the chart once
+    def flushStreamingSeries(self):
+        streaming_series = [series for series in self.series_dict.values()
+                            if isinstance(series, SmartStreamingSeries) and series.buffer.size > 0]
+        dirty_series = [series for series in streaming_series if series.dirty]
+        if dirty_series == []:
+            # no new samples since the last frame
+            self.stream_timer.stop()
+            return
+        for series in dirty_series:
+            series.flush()
+        if self.stream_autoscale:
+            bounds = np.array([series.buffer.bounds() for series in streaming_series])
+            min_x, max_x = bounds[:, 0].min(), bounds[:, 1].max()
+            min_y, max_y = bounds[:, 2].min(), bounds[:, 3].max()
+            if max_x > min_x:
+                self.x_axis.setRange(min_x, max_x)
+            if max_y > min_y:
+                self.y_axis.setRange(min_y, max_y)
         self.updateAuxLineMarker()
         self.updateMarkerText()
         self.chart().update()
 
-    def plotXY(self, x, y, series_type="line", series: SmartLineSeries = None,hold_on=False):
+    # with pyramid=True a large line series answers zooms from a min/max pyramid built on ingest
+    def plotXY(self, x, y, series_type="line", series: SmartLineSeries = None,hold_on=False, pyramid=False):
         if not hold_on:
             self.setAxesProperty(x, y)
         if series is None:
             series = self.addNewSeries(series_type)
+        if isinstance(series, SmartLineSeries):
+            series.use_pyramid = pyramid
         self.updateSeries(series, x, y)
         self.updateDefaultRange()
 
@@ -142,6 +308,9 @@ class SmartChartView(QChartView):
         elif series_type == "scatter":
             new_series = SmartScatterSeries(
                 self, f"Series {len(self.series_dict)}")
+        elif series_type == "streaming":
+            new_series = SmartStreamingSeries(
+                self, f"Series {len(self.series_dict)}", self.stream_capacity)
         # add series to self.series_dict
         self.series_dict[new_series.id] = new_series
         # add series to chart
@@ -154,8 +323,11 @@ class SmartChartView(QChartView):
         self.chart().removeSeries(series)
         # remove series from self.series_dict
         del self.series_dict[series.id]
-        # remove id from SmartLineSeries Class id_pool
-        SmartLineSeries.id_pool.remove(series.id)
+        # release the id, line and scatter series share the id space
+        SmartLineSeries.id_allocator.release(series.id)
+        if getattr(series, "interpolated_series", None) is not None:
+            SmartLineSeries.id_allocator.release(series.interpolated_series.id)
+        self.intersection_cache.invalidateSeries(series.id)
         # update chart
         self.chart().update()
 
@@ -181,9 +353,10 @@ class SmartChartView(QChartView):
                 marker.drawVerticalMeasureLine()
             elif self.current_measure_type == "p2p":
                 marker.drawPointToPointMeasureLine()
-            self.addSeriestoXY(marker, self.x_axis, self.y_axis)
             marker.setVisible(True)
+            self.marker_overlay.addMarker(marker)
             self.measure_marker_dict[marker.id] = marker
+            self.hit_index.invalidate("measure")
             self.measure_marker_order.append(marker.id)
             self.active_measure_marker = None
             self.current_measure_type = "p2p"
@@ -207,9 +380,40 @@ class SmartChartView(QChartView):
                     alm.redraw()
         self.chart().update()
 
+    # cull all series to the visible range and redo the decimation of large series
+    def updateSeriesLOD(self):
+        for series in self.series_dict.values():
+            if isinstance(series, (SmartLineSeries, SmartScatterSeries)):
+                series.updateLOD()
+
+    # rebuild the pyramids that went stale while samples were appended
+    def rebuildPyramids(self):
+        for series in self.series_dict.values():
+            if isinstance(series, SmartLineSeries) and series.pyramid_stale:
+                series.pyramid_stale = False
+                if series.needsPyramid():
+                    series.buildPyramid()
+
+    # the nichols grid follows the visible window, its layer is repainted at once and the contour
+    # selection is rebuilt lazily after range changes
+    def updateNicholsGrid(self):
+        if self.nichols_grid is not None:
+            self.nichols_grid.layer.update()
+            self.nichols_grid.scheduleUpdate()
+
+    # width of the plot area in pixels, falls back to the widget width before the chart is laid out
+    def plotAreaWidth(self):
+        width = int(self.chart().plotArea().width())
+        if width <= 0:
+            width = max(self.width(), 100)
+        return width
+
     # sync the x range of the sub chart with the main chart(self)
     def updateSubChart(self):
         if self.sub_chart is not None:
+            # the sub chart follows the navigation of the main chart coarse as well
+            if self.coarse_rendering:
+                self.sub_chart.startCoarseRendering()
             if self.subchart_sync_x_axis:
                 self.sub_chart.x_axis.setRange(self.x_axis.min(), self.x_axis.max())
                 self.sub_chart.chart().update()
@@ -223,9 +427,7 @@ class SmartChartView(QChartView):
                 self.sub_chart.y_axis.setRange(sub_y_range*y_min_percent+self.sub_chart.default_y_range[0],
                                                         sub_y_range*y_max_percent+self.sub_chart.default_y_range[1])
                 self.sub_chart.chart().update()
-            self.sub_chart.updateAuxLineMarker()
-            self.sub_chart.updateMarkerText()
-            self.sub_chart.updateAllVLM()
+            self.sub_chart.scheduleUpdate("aux_lines", "marker_text", "vlm")
 
     # setup navigator
     def setupNavigator(self, navigator: PlotNavigator):
@@ -236,8 +438,9 @@ class SmartChartView(QChartView):
 
     def setNicholsFrequencyData(self, frequency_data):
         self.nichols_frequency_series = QLineSeries()
-        for index, data in enumerate(frequency_data):
-            self.nichols_frequency_series.append(index, data)
+        index, frequency_data = _toContiguousXY(
+            np.arange(len(frequency_data)), frequency_data)
+        self.nichols_frequency_series.replaceNp(index, frequency_data)
 
     def setDarkMode(self):
         # set the background of chart to dark
@@ -258,18 +461,15 @@ class SmartChartView(QChartView):
 
     def wheelEvent(self, event: QWheelEvent):
         if self.navigator.ui.zoom_button.isChecked():
+            self.startCoarseRendering()
             # zoom in or out using the mouse wheel
             if event.angleDelta().y() > 0:
                 self.chart().zoomIn()
             else:
                 self.chart().zoomOut()
             if self.navigator.ui.vertical_marker_button.isChecked():
-                self.updateAllVLM()
-            if self.navigator.ui.measure_button.isChecked():
-                self.updateMarkerText()
-            self.updateAuxLineMarker()
-            self.updateSubChart()
-            self.updateMarkerText()
+                self.scheduleUpdate("vlm")
+            self.scheduleUpdate("aux_lines", "sub_chart", "marker_text")
 
     def wrapPhase(self, phase: np.ndarray):
         return np.remainder(phase/np.pi*180 + 180, 360) - 180
@@ -323,6 +523,9 @@ class SmartChartView(QChartView):
             # if right click on the blank area and there is a measure marker whose fisrt point is selected, delete the measure marker
             if self.active_measure_marker is not None and not self.active_measure_marker.checkCompleteStatus():
                 self.active_measure_marker.clearPoint()
+                # the unfinished measure marker was never added, give its id back
+                MeasureMarker.id_allocator.release(self.active_measure_marker.id)
+                MeasureMarker.isinstance_count -= 1
                 self.active_measure_marker = None
                 self.current_measure_type = "horizontal"
                 self.point_selected = None
@@ -364,9 +567,9 @@ class SmartChartView(QChartView):
                 self.vlm_selected = None
 
         if self.navigator.ui.vertical_marker_button.isChecked():
-            self.updateAllVLM()
+            self.scheduleUpdate("vlm")
 
-        self.updateChartElements()
+        self.scheduleUpdate("sub_chart", "aux_lines", "marker_text")
         self.setDragMode(QChartView.NoDrag)
         super().mouseReleaseEvent(event)
 
@@ -414,12 +617,12 @@ class SmartChartView(QChartView):
             self.last_highlighted_alm = nearest_alm
             nearest_alm.highlightOn(2)
             nearest_alm.redraw()
-            self.chart().update()
+            self.scheduleUpdate("chart")
         else:
             if self.last_highlighted_alm is not None and self.last_highlighted_alm:
                 self.last_highlighted_alm.highlightOff()
                 self.last_highlighted_alm.redraw()
-                self.chart().update()
+                self.scheduleUpdate("chart")
 
         if self.measure_marker_dict != {} and self.moving_measure_marker_text_flag == True:
             chart_point = self.chart().mapToValue(event.position())
@@ -427,20 +630,21 @@ class SmartChartView(QChartView):
                 pos = self.moving_mm._convertPointFromChartViewtoViewPort(chart_point)
                 try:
                     self.moving_mm.text_item.setPos(pos)
-                    self.chart().update()
+                    self.scheduleUpdate("chart")
                 except:
                     print("text position error")
 
         if self.nichols_grid is not None and self.nichols_grid_text:
             chart_point = self.chart().mapToValue(event.position())
-            nearest_mc, dB_label = self.findNearestMCircle(chart_point)
-            nearest_nc, deg_label = self.findNearestNCircle(chart_point)
-            if nearest_mc is not None and nearest_nc is not None:
+            # closed loop readout at the cursor, snapped to the contours drawn nearby
+            dB_label, deg_label = self.nichols_grid.closedLoopReadout(
+                chart_point, 0.08*(self.x_axis.max() - self.x_axis.min()))
+            if dB_label is not None and deg_label is not None:
                 self.navigator.showLabelMsg(
                     f"{dB_label:g} dB, {deg_label:g} deg", time=5000)
-            elif nearest_mc is not None:
+            elif dB_label is not None:
                 self.navigator.showLabelMsg(f"{dB_label:g} dB", time=5000)
-            elif nearest_nc is not None:
+            elif deg_label is not None:
                 self.navigator.showLabelMsg(f"{deg_label:g} deg", time=5000)
 
         # call the base class method to allow zooming by rubber band
@@ -665,195 +869,48 @@ class SmartChartView(QChartView):
     def calculateDistance(self, p1: QPointF, p2: QPointF):
         return math.sqrt((p1.x() - p2.x())**2 + (p1.y() - p2.y())**2)
 
-    # calculate the gain margin of given the frequency as freq and magnitude as mag, and phase as phase
+    # calculate all gain and phase margins of the given frequency response, see findStabilityMargins
+    def calculateStabilityMargins(self, freq: list, mag: list, phase: list, dB: bool = True):
+        return findStabilityMargins(freq, mag, phase, dB)
+
+    # calculate the worst case margins of a family of responses given as (n_systems, n_freq) arrays,
+    # see findStabilityMarginsBatch
+    def calculateStabilityMarginsBatch(self, freq, mag, phase, dB: bool = True, processes: int = None):
+        return findStabilityMarginsBatch(freq, mag, phase, dB, processes)
+
+    # calculate the worst case gain margin of given the frequency as freq and magnitude as mag, and phase as phase
     def calculateGainMargin(self, freq: list, mag: list, phase: list, dB: bool = True):
-        # check if -180 is in between any two points in phase list
-        for i in range(len(phase)-1):
-            if (phase[i] < -180 and phase[i+1] > -180) or (phase[i] > -180 and phase[i+1] < -180):
-                # interpolate the phase value at phase = -180
-                freq_at_neg_180 = (-180-phase[i]) * (freq[i+1] -
-                                                     freq[i]) / (phase[i+1] - phase[i]) + freq[i]
-                # calculate the mag at the same index with interpolated
-                mag_at_neg_180 = (
-                    mag[i+1] - mag[i]) / (freq[i+1] - freq[i]) * (freq_at_neg_180 - freq[i]) + mag[i]
-                # calculate the gain margin
-                if dB:
-                    gain_margin = 0 - mag_at_neg_180
-                else:
-                    gain_margin = 1 / mag_at_neg_180
-                return gain_margin, freq_at_neg_180
-        print("Error no gain margin found!")
-        return None, None
+        gain_margins, freqs, _, _ = findStabilityMargins(freq, mag, phase, dB)
+        worst = _worstMarginIndex(gain_margins, dB)
+        if worst is None:
+            print("Error no gain margin found!")
+            return None, None
+        return gain_margins[worst], freqs[worst]
 
+    # calculate the worst case phase margin
     def calculatePhaseMargin(self, freq: list, mag: list, phase: list, dB: bool = True):
-        for i in range(len(mag)-1):
-            if (mag[i] < 0 and mag[i+1] > 0) or (mag[i] > 0 and mag[i+1] < 0):
-                # interpolate the phase value at phase = -180
-                freq_at_0dB = (-mag[i]) * (freq[i+1] - freq[i]
-                                           ) / (mag[i+1] - mag[i]) + freq[i]
-                # calculate the mag at the same index with interpolated
-                phase_at_0dB = (phase[i+1] - phase[i]) / (freq[i+1] -
-                                                          freq[i]) * (freq_at_0dB - freq[i]) + phase[i]
-                # calculate the gain margin
-                phase_margin = phase_at_0dB + 180
-                # print("the gain margin is ",gain_margin)
-                return phase_margin, freq_at_0dB
-        print("Error no phase margin found!")
-        return None
+        _, _, phase_margins, freqs = findStabilityMargins(freq, mag, phase, dB)
+        worst = _worstMarginIndex(phase_margins)
+        if worst is None:
+            print("Error no phase margin found!")
+            return None
+        return phase_margins[worst], freqs[worst]
 
-    # find nearst vertical line marker to the given x value
+    # find nearst vertical line marker to the given x value, within hit_tolerance pixels
     def findNearestVLM(self, x: float):
-        min_dis = min([abs(vlm.at(0).x() - x)/(x+0.01)
-                      for vlm in self.vertical_marker_dict.values()])
-        # if there is no vertical line marker nearby with 0.05 tolerance, return None
-        if abs(min_dis) > 0.05:
-            return None
-        # find the vertical line marker with the minimum distance to the given x value
-        nearest_vlm = min(self.vertical_marker_dict.values(),
-                          key=lambda vlm: abs(vlm.at(0).x() - x)/(x+0.01))
-        return nearest_vlm
+        return self.hit_index.nearestVLM(x)
 
-    # find nearst measure marker to the given point value
+    # find nearst measure marker to the given point value, within hit_tolerance pixels
     def findNearestMeasureMarker(self, point: QPointF):
-        # if the point is on any measure marker, return True
-        min_dis = 100
-        nearst_mm = None
-        for mm in self.measure_marker_dict.values():
-            p1 = mm.at(0)
-            p2 = mm.at(1)
-            # if p1 p2 form a vertical line
-            if p1.x() == p2.x():
-                # if the point's y value is not between p1 and p2, the dis is the distance between the point and point that close to the point on the line between p1 and p2
-                if not (p1.y() <= point.y() <= p2.y() or p2.y() <= point.y() <= p1.y()):
-                    # return the point that is closer to point
-                    if self.calculateDistance(point, p1) <= self.calculateDistance(point, p2):
-                        close_point = p1
-                    else:
-                        close_point = p2
-                    dis = self.calculateDistance(point, close_point)
-                    dis1 = abs(point.x() - close_point.x())
-                    dis2 = abs(point.y() - close_point.y())
-                    if (dis1 < 0.05*(self.x_axis.max() - self.x_axis.min()) and dis2 < 0.05*(self.y_axis.max() - self.y_axis.min())
-                            and dis < min_dis):
-                        nearst_mm = mm
-                        min_dis = dis
-                else:
-                    # if the point's y value is between p1 and p2, the dis is the distance between the point and the vertical line
-                    dis = abs(point.x() - p1.x())
-                    if dis < 0.05*(self.x_axis.max() - self.x_axis.min()) and dis < min_dis:
-                        nearst_mm = mm
-                        min_dis = dis
-            # if p1 p2 form a horizontal line
-            elif p1.y() == p2.y():
-                # if the point's x value is not between p1 and p2, the dis is the distance between the point and point that close to the point on the line between p1 and p2
-                if not (p1.x() <= point.x() <= p2.x() or p2.x() <= point.x() <= p1.x()):
-                    # return the point that is closer to point
-                    if self.calculateDistance(point, p1) <= self.calculateDistance(point, p2):
-                        close_point = p1
-                    else:
-                        close_point = p2
-                    dis = self.calculateDistance(point, close_point)
-                    dis1 = abs(point.x() - close_point.x())
-                    dis2 = abs(point.y() - close_point.y())
-                    if (dis1 < 0.05*(self.x_axis.max() - self.x_axis.min()) and dis2 < 0.05*(self.y_axis.max() - self.y_axis.min())
-                            and dis < min_dis):
-                        nearst_mm = mm
-                        min_dis = dis
-                else:
-                    # if the point is on the horizontal line, return True
-                    dis = abs(point.y() - p1.y())
-                    if dis < 0.05*(self.y_axis.max() - self.y_axis.min()) and dis < min_dis:
-                        nearst_mm = mm
-                        min_dis = dis
-            # if p1 p2 form a oblique line
-            else:
-                # find the y value of the point on line between p1 and p2 with x value of point.x()
-                y = (p2.y() - p1.y()) / (p2.x() - p1.x()) * \
-                    (point.x() - p1.x()) + p1.y()
-                # find the x value of the point on line between p1 and p2 with y value of point.y
-                x = (p2.x() - p1.x()) / (p2.y() - p1.y()) * \
-                    (point.y() - p1.y()) + p1.x()
-                if (abs(y-point.y()) < 0.05*(self.y_axis.max() - self.y_axis.min()) and
-                        abs(x-point.x()) < 0.05*(self.x_axis.max() - self.x_axis.min()) and
-                        math.sqrt((y-point.y())**2+(x-point.x())**2) < min_dis):
-                    nearst_mm = mm
-                    min_dis = math.sqrt((y-point.y())**2+(x-point.x())**2)
-
-        if nearst_mm is not None:
-            return nearst_mm
-        else:
-            return None
-    # find nearst auxiliary line to the given point value
+        return self.hit_index.nearestMeasureMarker(point)
 
+    # find nearst auxiliary line to the given point value, within hit_tolerance pixels
     def findNearestAuxiliaryLine(self, point: QPointF):
-        """
-        find nearst auxiliary line to the given point value.
-        The distance is calculated by the relative distance between the point and the auxiliary line, which is in percentage.
-        The threshold is 5%, which means if the distance is less than 5%, the point is considered to be on the auxiliary line.
-        """
-        # if the point is on any auxiliary line, return True
-        min_dis = 100000
-        nearst_al = None
-        for al in self.aux_line_dict.values():
-            if al.__class__.__name__ == "HorizontalAuxLineMarker" and al.aux_line_mode != "measure":
-                if al.points()[0].y() == 0:
-                    al_min_dis = abs(al.points()[0].y() - point.y())
-                else:
-                    # al_min_dis = abs(al.points()[0].y() - point.y())/abs(al.points()[0].y())4
-                    if self.y_axis.type() == QAbstractAxis.AxisType.AxisTypeValue and self.plot_type == "bode_mag":
-                        if al.points()[0].y() - point.y() == 0:
-                            al_min_dis = 0
-                        else:
-                            al_min_dis = 20 * \
-                                np.log(
-                                    abs(al.points()[0].y() - point.y()))/abs(self.y_axis.max() - self.y_axis.min())
-                    elif self.y_axis.type() == QAbstractAxis.AxisType.AxisTypeValue and self.plot_type == "bode_phase":
-                        al_min_dis = abs(
-                            al.points()[0].y() - point.y())/abs(self.y_axis.max() - self.y_axis.min())
-                    elif self.y_axis.type() == QAbstractAxis.AxisType.AxisTypeLogValue:
-                        al_min_dis = np.log(abs(al.points()[0].y(
-                        ) - point.y()))/abs(np.log(self.y_axis.max() / self.y_axis.min()))
-                    else:
-                        al_min_dis = abs(
-                            al.points()[0].y() - point.y())/abs(self.y_axis.max() - self.y_axis.min())
-
-                if min_dis > al_min_dis:
-                    min_dis = al_min_dis
-                    nearst_al = al
-            if al.__class__.__name__ == "VerticalAuxLineMarker" and al.aux_line_mode != "measure":
-                if al.points()[0].x() == 0:
-                    al_min_dis = abs(al.points()[0].x() - point.x())
-                else:
-                    # al_min_dis = abs(al.points()[0].x() - point.x())/abs(al.points()[0].x())
-                    if self.x_axis.type() == QAbstractAxis.AxisType.AxisTypeValue:
-                        al_min_dis = abs(
-                            al.points()[0].x() - point.x())/abs(self.x_axis.max() - self.x_axis.min())
-                    elif self.x_axis.type() == QAbstractAxis.AxisType.AxisTypeLogValue:
-                        if abs(al.points()[0].x() - point.x()) == 0:
-                            al_min_dis = 0
-                        else:
-                            al_min_dis = np.log(
-                            abs(al.points()[0].x() - point.x()))/np.log(self.x_axis.max() / self.x_axis.min())
-                if min_dis > al_min_dis:
-                    min_dis = al_min_dis
-                    nearst_al = al
-
-        if nearst_al is None:
-            return None
-        if nearst_al.__class__.__name__ == "HorizontalAuxLineMarker" and nearst_al.aux_line_mode != "measure" and nearst_al.points()[0].y() == 0:
-            threshold = 0.08 * (self.y_axis.max() - self.y_axis.min())
-        elif nearst_al.__class__.__name__ == "VerticalAuxLineMarker" and nearst_al.aux_line_mode != "measure" and nearst_al.points()[0].x() == 0:
-            threshold = 0.08 * (self.x_axis.max() - self.x_axis.min())
-        else:
-            threshold = 0.08
-        # print("threshold:",threshold,"min_dis:",min_dis,"nearst_al:",nearst_al)
-        if min_dis <= threshold:  # self.auxiliaryLinethreshold:
-            return nearst_al
-        else:
-            return None
+        return self.hit_index.nearestAuxiliaryLine(point)
 
     # pan the chart by the given event
     def panChart(self, event: QMouseEvent,direction:str="both"):
+        self.startCoarseRendering()
 
         #chart_point = self.chart().mapToValue(event.position())
         chart_point = event.position()
@@ -885,105 +942,46 @@ class SmartChartView(QChartView):
             #self.chart().scroll(-self.pan_x_sensitivity * delta.x(), 0)
         elif direction == "y":
             self.chart().scroll(0, self.pan_y_sensitivity/(zoom_level_y)*delta.y())
-        self.updateSubChart()
-        self.updateMarkerText()
-        self.updateAuxLineMarker()
+        self.scheduleUpdate("sub_chart", "marker_text", "aux_lines")
     def updateMarkerText(self):
         # pan all the text item together with the chart
-        for mm in self.measure_marker_dict.values():
-            viewport_text_pos = mm._convertPointFromChartViewtoViewPort(QPointF(mm.measure_line.center().x(),
-                                                                                mm.measure_line.center().y()))
-            viewport_point1_pos = mm.point1_marker._convertPointFromChartViewtoViewPort(QPointF(mm.point1_marker.x_value,
-                                                                                                mm.point1_marker.y_value))
-            viewport_point2_pos = mm.point2_marker._convertPointFromChartViewtoViewPort(QPointF(mm.point2_marker.x_value,
-                                                                                                mm.point2_marker.y_value))
-            if not mm.text_pos_lock:
-                mm.text_item.setPos(viewport_text_pos)
-            mm.point1_marker.point_coordinate_label.setPos(viewport_point1_pos)
-            mm.point2_marker.point_coordinate_label.setPos(viewport_point2_pos)
-
-        # pan all the point coordinate label together with the auxiliary line marker
-        for alm in self.aux_line_dict.values():
-            if alm.aux_line_mode == "measure":
-                continue
-            for point_marker in alm.point_marker.values():
-                point_marker_viewport_text_pos = point_marker._convertPointFromChartViewtoViewPort(QPointF(point_marker.x_value,
-                                                                                                           point_marker.y_value))
-                point_marker.point_coordinate_label.setPos(
-                    point_marker_viewport_text_pos)
+        markers = [mm for mm in self.measure_marker_dict.values() if not mm.text_pos_lock]
+        if markers:
+            centers = np.array([(mm.measure_line.center().x(), mm.measure_line.center().y()) for mm in markers])
+            x, y = self.chart_transform.mapToViewport(centers[:, 0], centers[:, 1])
+            for mm, text_x, text_y in zip(markers, x.tolist(), y.tolist()):
+                mm.text_item.setPos(text_x, text_y)
+        # the point coordinate labels are painted at their points by the marker overlay
+        self.marker_overlay.update()
 
     def addVerticalLineMarker(self, series: QLineSeries, x_pos: float):
         new_vlm = VerticalLineMarker(self, series, x_pos)
         return new_vlm
 
     def addMCircles(self, m: float):
-        center = QPointF(-m**2/(m**2-1), 0)
-        radius = np.sqrt(m**2/(m**2-1)**2)
-        angle_array = []
-        mag_array = []
-        # create a circle data series
-        iter_array = np.concatenate(
-            (np.arange(0, 10, .1), np.arange(10, 350, 1), np.arange(350, 360, 0.1)))
-        for i in iter_array:
-            x = center.x() + radius * math.cos(math.radians(i))
-            y = center.y() + radius * math.sin(math.radians(i))
-            mag = np.abs(x+y*1j)
-            angle = np.angle(x+y*1j, deg=True)
-            angle_array.append(angle)
-            mag_array.append(mag)
-        angle_array = np.unwrap(angle_array, period=360, discont=180)
+        angle_array, mag_array = getNicholsContours("m", [20*np.log10(m)])[0]
         centers = self.findMCircleCenter()
         for center in centers:
             new_series = QLineSeries()
             new_series.setPen(
                 QPen(Qt.GlobalColor.gray, 1, Qt.PenStyle.DashLine))
-            angle_arr = self.adjustNicholsPhase(center, angle_array)
-            for angle, mag in zip(angle_arr, mag_array):
-                new_series.append(angle, 20*np.log10(mag))
+            angle_arr = shiftNicholsPhase(center, angle_array)
+            new_series.replaceNp(*_toContiguousXY(angle_arr, 20*np.log10(mag_array)))
             self.chart().addSeries(new_series)
             self.chart().setAxisX(self.x_axis, new_series)
             self.chart().setAxisY(self.y_axis, new_series)
 
     def getNCircles(self, alpha: float):
-        # phase_array = [10,20,30,40,60,80,120,-120,-80,-60,-40,-30,-20,-10]
-        N = np.tan(alpha/180*np.pi)
-        center = QPointF(-1/2, 1/(2*N))
-        radius = np.sqrt(1/4+(1/(2*N))**2)
-        angle_array = []
-        mag_array = []
-        iter_array = np.concatenate(
-            (np.arange(0, 10, .1), np.arange(10, 350, 1), np.arange(350, 360.1, 0.1)))
-        for i in iter_array:
-            if i == 270:
-                continue
-            x = center.x() + radius * math.cos(math.radians(i))
-            y = center.y() + radius * math.sin(math.radians(i))
-            mag = np.abs(x+y*1j)
-            angle = np.angle(x+y*1j, deg=True)
-            if mag == 0 and angle == 0:
-                continue
-            if 20*np.log10(mag) < -40:
-                continue
-            angle_array.append(angle)
-            mag_array.append(mag)
-        angle_array = list(np.unwrap(angle_array, period=360, discont=180))
-        angle_array.append(min(angle_array)-0.1)
-        mag_array.append(10**(-1000/20))
-        angle_array.append(max(angle_array)+0.1)
-        mag_array.append(10**(-1000/20))
+        angle_array, mag_array = getNicholsContours("n", [alpha])[0]
         centers = self.findMCircleCenter()
         for center in centers:
-            new_series = QLineSeries()
-            angle_arr = self.adjustNicholsPhase(center, np.array(angle_array))
-            for angle, mag in zip(angle_arr, mag_array):
-                new_series.append(angle, 20*np.log10(mag))
-            points = new_series.points()
-            points.sort(key=lambda point: (point.x(), point.y()))
             new_series = QLineSeries()
             new_series.setPen(
                 QPen(Qt.GlobalColor.gray, 1, Qt.PenStyle.DashLine))
-            for point in points:
-                new_series.append(point)
+            angle_arr = shiftNicholsPhase(center, angle_array)
+            mag_db = 20*np.log10(mag_array)
+            order = np.lexsort((mag_db, angle_arr))
+            new_series.replaceNp(*_toContiguousXY(angle_arr[order], mag_db[order]))
             self.chart().addSeries(new_series)
             self.chart().setAxisX(self.x_axis, new_series)
             self.chart().setAxisY(self.y_axis, new_series)
@@ -1001,72 +999,29 @@ class SmartChartView(QChartView):
     def findNearestMCircle(self, point: QPointF):
         if self.nichols_grid is None:
             return None
-        min_dis = 100000
-        nearst_mc = None
-        for mc in self.nichols_grid.m_circles_series_list:
-            # find the minimum distance between the point and the point on the circle
-            min = 100000
-            for mc_point in mc.points():
-                if self.calculateDistance(point, mc_point) < min:
-                    min = self.calculateDistance(point, mc_point)
-            if min < min_dis:
-                min_dis = min
-                nearst_mc = mc
-
-        # return the index of nearst_mc in the m_circles_series_list
-        index = self.nichols_grid.m_circles_series_list.index(nearst_mc)
-
-        if min_dis < 0.08*(self.x_axis.max() - self.x_axis.min()):
-            num_of_mag = len(self.nichols_grid.m_circle_magnitude)
-            db_label = 20 * \
-                np.log10(
-                    self.nichols_grid.m_circles_list[index % num_of_mag].magnitude)
-            return nearst_mc, db_label
-
-        return None, None
-        self.navigator.showLabelMsg(f"{db_label:g} dB")
+        return self._findNearestContour(point, self.nichols_grid.m_contours, self.nichols_grid.m_contour_labels)
 
     def findNearestNCircle(self, point: QPointF):
         if self.nichols_grid is None:
             return None
-        min_dis = 100000
-        nearst_nc = None
-        for nc in self.nichols_grid.n_circles_series_list:
-            # find the minimum distance between the point and the point on the circle
-            min = 100000
-            for nc_point in nc.points():
-                if self.calculateDistance(point, nc_point) < min:
-                    min = self.calculateDistance(point, nc_point)
-            if min < min_dis:
-                min_dis = min
-                nearst_nc = nc
-
-        # return the index of nearst_mc in the m_circles_series_list
-        index = self.nichols_grid.n_circles_series_list.index(nearst_nc)
-
-        if min_dis < 0.08*(self.x_axis.max() - self.x_axis.min()):
-            num_of_phase = len(self.nichols_grid.n_circle_phase)
-            phase_label = self.nichols_grid.n_circles_list[index %
-                                                           num_of_phase].phase
-            return nearst_nc, phase_label
+        return self._findNearestContour(point, self.nichols_grid.n_contours, self.nichols_grid.n_contour_labels)
+
+    # nearest drawn (phase, dB) contour to the point and its label, (None, None) if none is close enough
+    def _findNearestContour(self, point: QPointF, contours: list, labels: list):
+        min_dis = np.inf
+        nearest = None
+        for index, (phase_array, mag_db_array) in enumerate(contours):
+            dis = np.min(np.hypot(phase_array - point.x(), mag_db_array - point.y()))
+            if dis < min_dis:
+                min_dis = dis
+                nearest = index
+        if nearest is not None and min_dis < 0.08*(self.x_axis.max() - self.x_axis.min()):
+            return contours[nearest], labels[nearest]
         return None, None
 
     def adjustNicholsPhase(self, center, phase_array: np.ndarray):
         # adjust the phase array by adding 360 or minusing 360 to make sure the center is in the array
-        min_phase = min(phase_array)
-        max_phase = max(phase_array)
-        while min_phase - center >= 180:
-            phase_array -= 360
-            min_phase = min(phase_array)
-        while max_phase - center <= -180:
-            phase_array += 360
-            max_phase = max(phase_array)
-        # for i in range(len(phase_array)):
-        #     while phase_array[i] - center > 180:
-        #         phase_array[i] -= 360
-        #     while phase_array[i] - center < -180:
-        #         phase_array[i] += 360
-        return phase_array
+        return shiftNicholsPhase(center, phase_array)
 
     # delete the given vertical line marker
     def deleteVerticalLineMarker(self, vlm: VerticalLineMarker):
@@ -1076,8 +1031,9 @@ class SmartChartView(QChartView):
         self.chart().scene().removeItem(vlm.text_item)
         # remove the given vertical line marker from the vertical_marker_dict
         del self.vertical_marker_dict[vlm.id]
-        # dremove the id of the given vertical line marker from the id_pool
-        VerticalLineMarker.id_pool.remove(vlm.id)
+        self.hit_index.invalidate("vlm")
+        # release the id of the given vertical line marker
+        VerticalLineMarker.id_allocator.release(vlm.id)
         # delete the given vertical line marker
         del vlm
         # if there is no vertical line marker left, uncheck the vertical line marker button
@@ -1089,14 +1045,15 @@ class SmartChartView(QChartView):
     # delete the given measure marker
     def deleteMeasureMarker(self, mm: MeasureMarker):
         # remove the given measure marker from the chart
-        self.chart().removeSeries(mm)
+        self.marker_overlay.removeMarker(mm)
         mm.clearMeasureLine()
         # remove the given measure marker from the measure_marker_dict
         del self.measure_marker_dict[mm.id]
+        self.hit_index.invalidate("measure")
         # pop the id in the measure_marker_order list
         self.measure_marker_order.remove(mm.id)
-        # dremove the id of the given measure marker from the id_pool
-        MeasureMarker.id_pool.remove(mm.id)
+        # release the id of the given measure marker
+        MeasureMarker.id_allocator.release(mm.id)
         MeasureMarker.isinstance_count -= 1
         # delete the given measure marker
         del mm
@@ -1114,6 +1071,7 @@ class SmartChartView(QChartView):
         alm.clearMarker()
         # remove the given auxiliary line marker from the auxiliary_line_dict
         del self.aux_line_dict[alm.id]
+        self.hit_index.invalidate("aux_lines")
 
         # delete the variable to prevent alm being used after it was removed from dict
         del alm
@@ -1189,6 +1147,7 @@ class SmartChartView(QChartView):
                     aux_line.setColor(color)
             # set mm's text item's color
             mm.text_item.setDefaultTextColor(color)
+            self.marker_overlay.update()
 
     # change the mesuare marker's item text's position by cursor position
     def changeMeasureTextPosition(self, mm: MeasureMarker):
@@ -1240,6 +1199,7 @@ class SmartChartView(QChartView):
         if color.isValid():
             alm.pen_backup.setColor(color)
             alm.setColor(color)
+            self.marker_overlay.update()
 
     # change the position of the auxiliary line marker
     def changeAuxLinePosition(self, alm: Union[VerticalAuxLineMarker, HorizontalAuxLineMarker]):
@@ -1278,6 +1238,7 @@ class SmartChartView(QChartView):
         elif type == "vertical":
             new_alm = VerticalAuxLineMarker(self, pos)
         self.aux_line_dict[new_alm.id] = new_alm
+        self.hit_index.invalidate("aux_lines")
         return new_alm
 
     # # reveal the nearest point in the series to the current mouse position
@@ -1324,28 +1285,32 @@ class SmartChartView(QChartView):
 
     def revealAuxLineIntersectionPoint(self, alm: Union[VerticalAuxLineMarker, HorizontalAuxLineMarker], series: SmartLineSeries):
         # if alm pass through series, return the intersection point
-        intersection_point = []
+        key = self.intersectionKey(alm, series)
+        if key is not None:
+            cached = self.intersection_cache.get(key)
+            if cached is not None:
+                return list(cached)
+        x_data, y_data = _seriesArrays(series)
         if alm.__class__.__name__ == "HorizontalAuxLineMarker":
-           # verify if the alm.y_value is between the y value of the point before and after the point
-            for i in range(1, len(series.points())):
-                point1 = series.points()[i-1]
-                point2 = series.points()[i]
-                if point1.y() <= alm.y_value <= point2.y() or point1.y() >= alm.y_value >= point2.y():
-                    # calculate the intersection point
-                    x = point1.x()+(point2.x()-point1.x()) * \
-                        (alm.y_value-point1.y())/(point2.y()-point1.y())
-                    intersection_point.append(QPointF(x, alm.y_value))
+            cross_x, cross_y = findCrossings(x_data, y_data, alm.y_value, "horizontal")
         elif alm.__class__.__name__ == "VerticalAuxLineMarker":
-            # verify if the alm.x_value is between the x value of the point before and after the point
-            for i in range(1, len(series.points())):
-                point1 = series.points()[i-1]
-                point2 = series.points()[i]
-                if point1.x() <= alm.x_value <= point2.x() or point1.x() >= alm.x_value >= point2.x():
-                    # calculate the intersection point
-                    y = point1.y()+(point2.y()-point1.y()) * \
-                        (alm.x_value-point1.x())/(point2.x()-point1.x())
-                    intersection_point.append(QPointF(alm.x_value, y))
-        return intersection_point
+            cross_x, cross_y = findCrossings(x_data, y_data, alm.x_value, "vertical")
+        else:
+            return []
+        intersection_point = [QPointF(x, y) for x, y in zip(cross_x.tolist(), cross_y.tolist())]
+        if key is not None:
+            self.intersection_cache.put(key, intersection_point)
+        return list(intersection_point)
+
+    # key of the intersections between alm and series, None if the series has no versioned data store
+    def intersectionKey(self, alm: Union[VerticalAuxLineMarker, HorizontalAuxLineMarker], series: SmartLineSeries):
+        if not hasattr(series, "series_data"):
+            return None
+        if alm.__class__.__name__ == "HorizontalAuxLineMarker":
+            return (series.id, series.series_data.version, "horizontal", alm.y_value)
+        elif alm.__class__.__name__ == "VerticalAuxLineMarker":
+            return (series.id, series.series_data.version, "vertical", alm.x_value)
+        return None
 
     def setAxesProperty(self, x_data: Union[list, np.ndarray] = [0.1, 2500], y_data: Union[list, np.ndarray] = [0, 100],
                         x_label: str = "", y_label: str = ""):
@@ -1354,10 +1319,9 @@ class SmartChartView(QChartView):
                 if self.chart().axes() != []:
                     self.chart().removeAxis(self.x_axis)
                     self.chart().removeAxis(self.y_axis)
-            # if any series is attached to the axis, remove the series from the axis
-            for series in self.series_dict.values():
-                self.chart().removeSeries(series)
-            self.series_dict.clear()
+            # if any series is attached to the axis, remove the series, which also releases their ids
+            for series in list(self.series_dict.values()):
+                self.removeSeries(series)
         # set default x y axes
         if self.plot_type == "bode_mag":
             self.x_axis = QLogValueAxis()
@@ -1369,8 +1333,8 @@ class SmartChartView(QChartView):
 
             self.y_axis = QValueAxis()
             self.y_axis.setLabelFormat("%g")
-            self.y_axis.setRange(((min(y_data)-20)//20+1)
-                                 * 20, ((max(y_data)+20)//20+1)*20)
+            self.y_axis.setRange(((np.min(y_data)-20)//20+1)
+                                 * 20, ((np.max(y_data)+20)//20+1)*20)
             # self.y_axis.setTickType(QValueAxis.TickType.TicksDynamic)
             # self.y_axis.setTickInterval(20)
             # self.y_axis.setTickAnchor(0)
@@ -1392,13 +1356,13 @@ class SmartChartView(QChartView):
             self.y_axis.setTickAnchor(-90)
             self.y_axis.setTickAnchor(180)
             self.y_axis.setTickAnchor(-180)
-            self.y_axis.setRange(min(y_data)-45, max(y_data)+45)
+            self.y_axis.setRange(np.min(y_data)-45, np.max(y_data)+45)
             self.y_axis.setTitleText(y_label)
 
         elif self.plot_type == "nichols":
             self.x_axis = QValueAxis()
             self.x_axis.setLabelFormat("%g")
-            self.x_axis.setRange(min(x_data)-20, max(x_data)+20)
+            self.x_axis.setRange(np.min(x_data)-20, np.max(x_data)+20)
             #self.x_axis.setRange(-360, 0)
             self.x_axis.setTitleText(x_label)
             self.x_axis.setTickType(QValueAxis.TicksDynamic)
@@ -1406,21 +1370,21 @@ class SmartChartView(QChartView):
 
             self.y_axis = QValueAxis()
             self.y_axis.setLabelFormat("%g")
-            self.y_axis.setRange(((min(y_data)-20)//20+1)
-                                 * 20, ((max(y_data)+20)//20+1)*20)
+            self.y_axis.setRange(((np.min(y_data)-20)//20+1)
+                                 * 20, ((np.max(y_data)+20)//20+1)*20)
             self.y_axis.setTitleText(y_label)
 
         elif self.plot_type == "normal":
             self.x_axis = QValueAxis()
             self.x_axis.setLabelFormat("%g")
-            self.x_axis.setRange(min(x_data), max(x_data))
+            self.x_axis.setRange(np.min(x_data), np.max(x_data))
             self.x_axis.setTitleText(x_label)
             self.x_axis.setTickType(QValueAxis.TicksDynamic)
             self.x_axis.setTickInterval(10)
 
             self.y_axis = QValueAxis()
             self.y_axis.setLabelFormat("%g")
-            self.y_axis.setRange(min(y_data), max(y_data))
+            self.y_axis.setRange(np.min(y_data), np.max(y_data))
             self.y_axis.setTitleText(y_label)
             self.y_axis.setTickType(QValueAxis.TicksDynamic)
             self.y_axis.setTickInterval(10)
@@ -1429,6 +1393,14 @@ class SmartChartView(QChartView):
         self.x_axis.setLabelsFont(QFont("Arial", 8))
         # y label font size
         self.y_axis.setLabelsFont(QFont("Arial", 8))
+        self.connectAxisRange(self.x_axis)
+        self.connectAxisRange(self.y_axis)
+
+    # everything that follows the range of an axis. the series are culled in x and y and large series are
+    # decimated again, the nichols grid selects the contours of the visible window
+    def connectAxisRange(self, axis: QAbstractAxis):
+        axis.rangeChanged.connect(self.updateSeriesLOD)
+        axis.rangeChanged.connect(self.updateNicholsGrid)
 
     def adjustYTicks(self):
         if isinstance(self.y_axis, QValueAxis) and self.plot_type == "bode_mag":
@@ -1505,13 +1477,15 @@ class SmartChartView(QChartView):
             change_Y = True
 
         if change_X:
+            self.connectAxisRange(self.x_axis)
             for series in self.series_dict.values():
                 if series._isNegValueContained() and new_x_axis_type == QAbstractAxis.AxisType.AxisTypeLogValue:
                     self.navigator.showLabelMsg(
                         "Negative value is contained in the series, cannot change to log value axis")
                     return
                 self.chart().setAxisX(self.x_axis, series)
-        elif change_Y:
+        if change_Y:
+            self.connectAxisRange(self.y_axis)
             for series in self.series_dict.values():
                 if series._isNegValueContained() and new_y_axis_type == QAbstractAxis.AxisType.AxisTypeLogValue:
                     self.navigator.showLabelMsg(
@@ -1520,6 +1494,8 @@ class SmartChartView(QChartView):
                 self.chart().setAxisY(self.y_axis, series)
                 # self.chart().setAxisY(self.y_axis, series)
 
+        # cull the series again for the new axes
+        self.updateSeriesLOD()
         self.chart().update()
         self.updateSubChart()
         self.updateMarkerText()
@@ -1551,7 +1527,7 @@ class SmartChartView(QChartView):
         if intersection_points != []:
             alm.deletePointMarkers()
             for point in intersection_points:
-                alm.addPointMarker(PointMarker(self, point.x(), point.y()))
+                alm.addPointMarker(self.point_marker_pool.acquire(point.x(), point.y()))
 
     def showIntersectionPoint(self, alm: Union[VerticalAuxLineMarker, HorizontalAuxLineMarker], which_point: str = "next"):
         # pop up a dialog to ask user to select a series to show intersection point, if no series is selected, return
@@ -1572,37 +1548,48 @@ class SmartChartView(QChartView):
         else:
             series = series_list[0]
         intersection_points = self.revealAuxLineIntersectionPoint(alm, series)
+        key = self.intersectionKey(alm, series)
+        if key is not None:
+            same_intersection = alm.intersection_key == key
+        else:
+            same_intersection = alm.intersection_series == series and alm.intersection_points == intersection_points
         if intersection_points != []:
             alm.deletePointMarkers()  # clear all previous point markers
             if which_point == "next":
-                if alm.intersection_series == series and alm.intersection_points == intersection_points:
+                if same_intersection:
                     if len(alm.intersection_points_copy) == 0:
                         alm.intersection_points_copy = intersection_points.copy()
                     next_point = alm.intersection_points_copy.pop(0)
-                    alm.addPointMarker(PointMarker(
-                        self, next_point.x(), next_point.y()))
+                    alm.addPointMarker(self.point_marker_pool.acquire(
+                        next_point.x(), next_point.y()))
                 else:
                     # if the intersection points are not the same as the previous one, update the intersection points and series
                     alm.intersection_series = series
+                    alm.intersection_key = key
                     alm.setIntersectionPoints(intersection_points)
                     next_point = alm.intersection_points_copy.pop(0)
-                    alm.addPointMarker(PointMarker(
-                        self, next_point.x(), next_point.y()))
+                    alm.addPointMarker(self.point_marker_pool.acquire(
+                        next_point.x(), next_point.y()))
             elif which_point == "all":
                 for point in intersection_points:
-                    alm.addPointMarker(PointMarker(self, point.x(), point.y()))
+                    alm.addPointMarker(self.point_marker_pool.acquire(point.x(), point.y()))
         else:
             self.navigator.showLabelMsg("No intersection point found")
 
     # display gain margin marker on the main chart
-    def showGainMarginMarker(self, freq: list, mag: list, phase: list, dB=True):
-        gain_margin, freq_neg_180 = self.calculateGainMargin(
-            freq, mag, phase, dB)
-        if gain_margin is not None:
-            alm = self.addAuxiliaryLineMarker("vertical", freq_neg_180)
+    # mark the worst case gain margin, or every phase crossover frequency if all_crossings is set
+    def showGainMarginMarker(self, freq: list, mag: list, phase: list, dB=True, all_crossings=False):
+        gain_margins, freqs, _, _ = findStabilityMargins(freq, mag, phase, dB)
+        worst = _worstMarginIndex(gain_margins, dB)
+        if worst is None:
+            print("Error no gain margin found!")
+            return
+        marker_freqs = freqs if all_crossings else freqs[worst:worst+1]
+        for freq_neg_180 in marker_freqs:
+            alm = self.addAuxiliaryLineMarker("vertical", float(freq_neg_180))
             self.showNextIntersectionPoint(alm)
             if self.sub_chart is not None:
-                self.sub_chart.addAuxiliaryLineMarker("vertical", freq_neg_180)
+                self.sub_chart.addAuxiliaryLineMarker("vertical", float(freq_neg_180))
 
     def showNicholsGrid(self):
         # show nichols grid on the main chart
@@ -1614,17 +1601,37 @@ class SmartChartView(QChartView):
                 self.nichols_grid.hideGrid()
                 self.nichols_grid = None
 
+    # show the worst case stability margins of the first visible series on the nichols chart
     def showStabilityMargin(self):
         if self.plot_type == "nichols":
-            self.showNicholsMargin()
+            series_list = [series for series in self.series_dict.values() if series.isVisible()]
+            if len(series_list) == 0:
+                self.navigator.showLabelMsg("No series to select")
+                return
+            # nichols series hold phase as x and magnitude in dB as y
+            phase, mag = _seriesArrays(series_list[0])
+            freq = np.arange(len(phase), dtype=np.float64)
+            if self.nichols_frequency_series is not None and self.nichols_frequency_series.count() == len(phase):
+                _, freq = _seriesArrays(self.nichols_frequency_series)
+            gain_margins, _, phase_margins, _ = findStabilityMargins(freq, mag, phase)
+            worst_gm = _worstMarginIndex(gain_margins)
+            worst_pm = _worstMarginIndex(phase_margins)
+            if worst_gm is None and worst_pm is None:
+                self.navigator.showLabelMsg("No stability margin found")
+                return
+            self.showNicholsMargin(None if worst_gm is None else gain_margins[worst_gm],
+                                   None if worst_pm is None else phase_margins[worst_pm])
 
+    # a margin given as None is not drawn
     def showNicholsMargin(self, gm: float = 10, pm: float = 50, color: str = "red"):
-        self.nichols_margin_alm_h = self.addAuxiliaryLineMarker(
-            "horizontal", 0-gm)
-        self.nichols_margin_alm_v = self.addAuxiliaryLineMarker(
-            "vertical", -180+pm)
-        self.changeAuxLineColor(self.nichols_margin_alm_h, color)
-        self.changeAuxLineColor(self.nichols_margin_alm_v, color)
+        if gm is not None:
+            self.nichols_margin_alm_h = self.addAuxiliaryLineMarker(
+                "horizontal", 0-gm)
+            self.changeAuxLineColor(self.nichols_margin_alm_h, color)
+        if pm is not None:
+            self.nichols_margin_alm_v = self.addAuxiliaryLineMarker(
+                "vertical", -180+pm)
+            self.changeAuxLineColor(self.nichols_margin_alm_v, color)
         self.nichols_margin_lines = True
 
     def hideNicholsMargin(self):
@@ -1688,8 +1695,8 @@ class SmartChartView(QChartView):
             index, ok = QInputDialog.getInt(
                 self, "Select a point", "Index:", 1, 1, len(intersection_points), 1)
             if ok:
-                alm.addPointMarker(PointMarker(
-                    self, intersection_points[index-1].x(), intersection_points[index-1].y()))
+                alm.addPointMarker(self.point_marker_pool.acquire(
+                    intersection_points[index-1].x(), intersection_points[index-1].y()))
         else:
             self.navigator.showLabelMsg("No intersection point found")
 
@@ -1707,10 +1714,765 @@ class SmartChartView(QChartView):
         return math.sqrt((point1.x()-point2.x())**2+(point1.y()-point2.y())**2)
 
 
+# convert x,y data to contiguous float arrays that QXYSeries.replaceNp can read directly
+# with copy the arrays never share memory with the input, even if it already has the right layout
+def _toContiguousXY(x_data, y_data, copy: bool = False):
+    x_data = np.asarray(x_data)
+    y_data = np.asarray(y_data)
+    if x_data.ndim != 1 or y_data.ndim != 1 or len(x_data) != len(y_data):
+        raise ValueError("x and y data must be 1-D and of the same length")
+    # replaceNp needs both arrays to share one float dtype, float32 is kept only if both are float32
+    if x_data.dtype == np.float32 and y_data.dtype == np.float32:
+        dtype = np.float32
+    else:
+        dtype = np.float64
+    if copy:
+        return np.array(x_data, dtype=dtype, order="C", copy=True), np.array(y_data, dtype=dtype, order="C", copy=True)
+    return np.ascontiguousarray(x_data, dtype=dtype), np.ascontiguousarray(y_data, dtype=dtype)
+
+
+# x,y arrays of a series, read from its data store when it has one
+def _seriesArrays(series: QLineSeries):
+    if hasattr(series, "series_data"):
+        return series.series_data.x_data, series.series_data.y_data
+    points = series.pointsVector()
+    return np.array([point.x() for point in points]), np.array([point.y() for point in points])
+
+
+# columnar x,y store of a series, it is the source of truth for all analysis on the series data
+# and QPointF objects are only made when the data is pushed to Qt.
+# version is increased on every change, so derived data can be cached against it.
+# appended samples go into buffers that double their capacity when full, x_data and y_data are views
+# of the filled part. samples are only ever written behind the filled part, so views handed out earlier
+# keep their data
+class SeriesData:
+    def __init__(self, x_data=(), y_data=()):
+        self.version = 0
+        self.setData(x_data, y_data)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def x_data(self):
+        return self._x_buffer[:self._size]
+
+    @property
+    def y_data(self):
+        return self._y_buffer[:self._size]
+
+    def setData(self, x_data, y_data):
+        # the store owns its data, the caller may change its arrays in place after this
+        self._x_buffer, self._y_buffer = _toContiguousXY(x_data, y_data, copy=True)
+        self._size = len(self._x_buffer)
+        self._changed()
+
+    # append one sample or arrays of samples
+    def append(self, x, y):
+        x = np.atleast_1d(np.asarray(x, dtype=self._x_buffer.dtype))
+        y = np.atleast_1d(np.asarray(y, dtype=self._y_buffer.dtype))
+        size = self._size + len(x)
+        if size > len(self._x_buffer):
+            capacity = max(2 * len(self._x_buffer), size, 16)
+            self._x_buffer = self._grow(self._x_buffer, capacity)
+            self._y_buffer = self._grow(self._y_buffer, capacity)
+        self._x_buffer[self._size:size] = x
+        self._y_buffer[self._size:size] = y
+        self._size = size
+        self.version += 1
+        self._segment_index = None
+        # fmin/fmax skip NaN samples as nanmin/nanmax do
+        if self._bounds is not None and len(x) > 0:
+            min_x, max_x, min_y, max_y = self._bounds
+            self._bounds = (np.fmin(min_x, np.fmin.reduce(x)), np.fmax(max_x, np.fmax.reduce(x)),
+                            np.fmin(min_y, np.fmin.reduce(y)), np.fmax(max_y, np.fmax.reduce(y)))
+
+    def _grow(self, buffer: np.ndarray, capacity: int):
+        grown = np.empty(capacity, dtype=buffer.dtype)
+        grown[:self._size] = buffer[:self._size]
+        return grown
+
+    def _changed(self):
+        self.version += 1
+        self._bounds = None
+        self._segment_index = None
+
+    # (min_x, max_x, min_y, max_y) of the data, None if there is no data
+    def bounds(self):
+        if self._size == 0:
+            return None
+        if self._bounds is None:
+            self._bounds = (np.nanmin(self.x_data), np.nanmax(self.x_data),
+                            np.nanmin(self.y_data), np.nanmax(self.y_data))
+        return self._bounds
+
+    # index i of the first segment [x_i, x_i+1] whose x span contains x_value, None if there is none.
+    # sorted x is searched by bisection, non-monotonic x (e.g. nichols data) falls back to a vectorized scan
+    def findSegment(self, x_value: float):
+        if len(self.x_data) < 2:
+            return None
+        if self._segment_index is None:
+            self._segment_index = self._buildSegmentIndex()
+        direction, key, left_x, right_x = self._segment_index
+        if direction == 0:
+            segments = np.flatnonzero((left_x <= x_value) & (x_value <= right_x))
+            return int(segments[0]) if len(segments) > 0 else None
+        # key is increasing, decreasing x is searched as -x
+        value = x_value if direction > 0 else -x_value
+        if value < key[0] or value > key[-1]:
+            return None
+        return max(int(np.searchsorted(key, value, side="left")) - 1, 0)
+
+    def _buildSegmentIndex(self):
+        x_data = self.x_data
+        steps = np.diff(x_data)
+        if np.all(steps >= 0):
+            return 1, x_data, None, None
+        if np.all(steps <= 0):
+            return -1, -x_data, None, None
+        return 0, None, np.minimum(x_data[:-1], x_data[1:]), np.maximum(x_data[:-1], x_data[1:])
+
+
+# min/max decimation of sorted x,y data over [x_min, x_max] into the given number of pixel columns
+# the first, last, min and max sample of every column is kept in their original order, so the
+# decimated line looks identical to the full one at that width, peaks and notches included.
+# with log_x the columns are equally wide in log10(x), as they are on a QLogValueAxis
+def decimateMinMax(x_data: np.ndarray, y_data: np.ndarray, x_min: float, x_max: float, columns: int,
+                   log_x: bool = False):
+    start, stop = _visibleSlice(x_data, x_min, x_max, log_x)
+    if log_x and (x_min <= 0 or x_max <= 0):
+        return x_data[start:stop], y_data[start:stop]
+    x = x_data[start:stop]
+    y = y_data[start:stop]
+    if columns < 1 or x_max <= x_min or len(x) <= 4 * columns:
+        return x, y
+
+    # pixel column of every visible sample, the neighbours fall into the columns -1 and columns
+    if log_x:
+        log_min = np.log10(x_min)
+        col = np.floor((np.log10(x) - log_min) * (columns / (np.log10(x_max) - log_min)))
+    else:
+        col = np.floor((x - x_min) * (columns / (x_max - x_min)))
+    np.clip(col, -1, columns, out=col)
+
+    # x is sorted, so every column is one contiguous run of samples
+    starts = np.flatnonzero(np.diff(col)) + 1
+    starts = np.concatenate(([0], starts))
+    ends = np.concatenate((starts[1:], [len(x)])) - 1
+    seg = np.repeat(np.arange(len(starts)), np.diff(np.concatenate((starts, [len(x)]))))
+
+    min_idx = _firstIndexOfValue(y, seg, np.fmin.reduceat(y, starts), starts)
+    max_idx = _firstIndexOfValue(y, seg, np.fmax.reduceat(y, starts), starts)
+
+    # np.unique sorts the indices, which keeps the samples in their original order
+    keep = np.unique(np.concatenate((starts, min_idx, max_idx, ends)))
+    return x[keep], y[keep]
+
+
+# index range of the visible samples of sorted x data plus one neighbour on each side, so the line is
+# clipped correctly at the edges
+def _visibleSlice(x_data: np.ndarray, x_min: float, x_max: float, log_x: bool = False):
+    start = max(int(np.searchsorted(x_data, x_min, side="left")) - 1, 0)
+    stop = min(int(np.searchsorted(x_data, x_max, side="right")) + 1, len(x_data))
+    if log_x:
+        # non-positive x can not be shown on a log axis
+        start = max(start, int(np.searchsorted(x_data, 0, side="right")))
+    return start, stop
+
+
+# all crossings of the series x,y with a horizontal (y = value) or vertical (x = value) line, in the
+# order they occur along the series. a sign change of (coordinate - value) between two samples is
+# interpolated linearly, a sample lying exactly on the line is a crossing by itself
+def findCrossings(x_data: np.ndarray, y_data: np.ndarray, value: float, orientation: str = "horizontal"):
+    if orientation == "horizontal":
+        coord, other = y_data, x_data
+    else:
+        coord, other = x_data, y_data
+    diff = coord - value
+    strict = np.flatnonzero(diff[:-1] * diff[1:] < 0)
+    on_line = np.flatnonzero(diff == 0)
+    ratio = diff[strict] / (diff[strict] - diff[strict + 1])
+    # position along the series, used to put both kinds of crossings in order
+    position = np.concatenate((strict + ratio, on_line))
+    order = np.argsort(position, kind="stable")
+    other_values = np.concatenate((other[strict] + ratio * (other[strict + 1] - other[strict]),
+                                   other[on_line]))[order]
+    line_values = np.full(len(other_values), value, dtype=np.float64)
+    if orientation == "horizontal":
+        return other_values, line_values
+    return line_values, other_values
+
+
+# all gain and phase margins of a frequency response in one pass.
+# the gain margin is read at every crossing of the phase with -180 + k*360 deg and the phase margin at
+# every crossing of the magnitude with 0 dB (or 1 if not dB). the crossing frequency is interpolated in
+# log10(freq). returns (gain_margins, phase_crossover_freqs, phase_margins, gain_crossover_freqs)
+def findStabilityMargins(freq, mag, phase, dB: bool = True):
+    freq = np.asarray(freq, dtype=np.float64)
+    mag = np.asarray(mag, dtype=np.float64)
+    phase = np.asarray(phase, dtype=np.float64)
+    if len(freq) < 2:
+        empty = np.empty(0)
+        return empty, empty, empty, empty
+    # non-finite samples are gaps, crossings are only interpolated between two neighbouring valid samples
+    valid = np.isfinite(freq) & np.isfinite(mag) & np.isfinite(phase)
+    pair = valid[:-1] & valid[1:]
+    # unwrapped phase, so a jump from -179 to 179 deg is seen as a crossing of -180 deg
+    phase = _unwrapPhase(phase, valid)
+
+    # phase crossings: the phase moves into another 360 deg band centered on -180 + k*360
+    band = np.floor((phase + 180) / 360)
+    i_pc = np.flatnonzero(pair & (band[:-1] != band[1:]))
+    level = -180 + 360 * np.maximum(band[i_pc], band[i_pc + 1])
+    t_pc = (level - phase[i_pc]) / (phase[i_pc + 1] - phase[i_pc])
+    mag_pc = mag[i_pc] + t_pc * (mag[i_pc + 1] - mag[i_pc])
+    if dB:
+        gain_margins = 0 - mag_pc
+    else:
+        with np.errstate(divide="ignore"):
+            gain_margins = 1 / mag_pc
+    phase_crossover_freqs = _interpolateFrequency(freq, i_pc, t_pc)
+
+    # gain crossings: the magnitude crosses 0 dB, a sample exactly on 0 dB is a crossing by itself
+    unity = mag - (0 if dB else 1)
+    i_gc = np.flatnonzero(pair & (unity[:-1] * unity[1:] < 0))
+    t_gc = unity[i_gc] / (unity[i_gc] - unity[i_gc + 1])
+    on_unity = np.flatnonzero(valid & (unity == 0))
+    order = np.argsort(np.concatenate((i_gc + t_gc, on_unity)), kind="stable")
+    phase_gc = np.concatenate((phase[i_gc] + t_gc * (phase[i_gc + 1] - phase[i_gc]), phase[on_unity]))[order]
+    # distance to the nearest -180 + k*360 deg, in [-180, 180)
+    phase_margins = np.remainder(phase_gc + 360, 360) - 180
+    gain_crossover_freqs = np.concatenate((_interpolateFrequency(freq, i_gc, t_gc), freq[on_unity]))[order]
+
+    return gain_margins, phase_crossover_freqs, phase_margins, gain_crossover_freqs
+
+
+# np.unwrap of the phase in deg along the last axis, taken over the valid samples only, so a NaN does
+# not spread to every later sample. the steps across a gap are unwrapped as well, invalid samples are NaN
+def _unwrapPhase(phase: np.ndarray, valid: np.ndarray):
+    n = phase.shape[-1]
+    last_valid = np.maximum.accumulate(np.where(valid, np.arange(n), -1), axis=-1)
+    # index of the valid sample before every sample, -1 if there is none
+    previous = np.concatenate((np.full(phase.shape[:-1] + (1,), -1), last_valid[..., :-1]), axis=-1)
+    has_previous = valid & (previous >= 0)
+    step = np.where(has_previous, phase - np.take_along_axis(phase, np.maximum(previous, 0), axis=-1), 0)
+    # same rounding as np.unwrap, a step of exactly +180 deg is kept
+    wrapped = np.remainder(step + 180, 360) - 180
+    wrapped = np.where((wrapped == -180) & (step > 0), 180, wrapped)
+    turns = np.where(np.abs(step) < 180, 0, wrapped - step)
+    return np.where(valid, phase + np.cumsum(turns, axis=-1), np.nan)
+
+
+# frequency at position i + t of freq, interpolated in log10(freq) where both samples are positive
+def _interpolateFrequency(freq: np.ndarray, i: np.ndarray, t: np.ndarray):
+    f1, f2 = freq[i], freq[i + 1]
+    linear = f1 + t * (f2 - f1)
+    positive = (f1 > 0) & (f2 > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        logarithmic = f1 * (f2 / f1) ** t
+    return np.where(positive, logarithmic, linear)
+
+
+# index of the worst case margin, the one closest to instability, None if there is no finite margin
+def _worstMarginIndex(margins: np.ndarray, dB: bool = True):
+    score = _marginScore(np.asarray(margins, dtype=np.float64), dB)
+    if len(score) == 0 or not np.isfinite(score).any():
+        return None
+    return int(np.argmin(score))
+
+
+# distance of margins from instability, +inf for NaN margins and for gain ratios that are not positive
+def _marginScore(margins: np.ndarray, dB: bool = True):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = np.abs(margins) if dB else np.abs(np.log(margins))
+    return np.where(np.isnan(score), np.inf, score)
+
+
+# worst case stability margins of a family of frequency responses, e.g. monte carlo perturbed plants.
+# mag and phase are (n_systems, n_freq) arrays, freq is shared (n_freq,) or per system (n_systems, n_freq).
+# returns the (gain_margins, phase_crossover_freqs, phase_margins, gain_crossover_freqs) vectors of length
+# n_systems, NaN where a system has no crossing. with processes the rows are split over a process pool
+def findStabilityMarginsBatch(freq, mag, phase, dB: bool = True, processes: int = None, chunk_size: int = 256):
+    mag = np.atleast_2d(np.asarray(mag, dtype=np.float64))
+    phase = np.atleast_2d(np.asarray(phase, dtype=np.float64))
+    freq = np.asarray(freq, dtype=np.float64)
+    if mag.ndim != 2 or mag.shape != phase.shape:
+        raise ValueError(f"mag and phase must be (n_systems, n_freq) arrays of the same shape, "
+                         f"got {mag.shape} and {phase.shape}")
+    if mag.shape[1] < 2:
+        raise ValueError(f"at least 2 frequencies are needed, got {mag.shape[1]}")
+    if freq.shape not in ((mag.shape[1],), mag.shape):
+        raise ValueError(f"freq must be a ({mag.shape[1]},) or {mag.shape} array, got {freq.shape}")
+    freq = np.broadcast_to(freq, mag.shape)
+    if processes is None or len(mag) <= chunk_size:
+        return _stabilityMarginsChunk((freq, mag, phase, dB))
+
+    chunks = [(freq[i:i + chunk_size], mag[i:i + chunk_size], phase[i:i + chunk_size], dB)
+              for i in range(0, len(mag), chunk_size)]
+    # spawn, a forked worker would inherit the qt and executor threads of this process
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as executor:
+        results = list(executor.map(_stabilityMarginsChunk, chunks))
+    return tuple(np.concatenate([result[k] for result in results]) for k in range(4))
+
+
+# worst case margins of every row of one chunk, runs in a worker process for the batched margins
+def _stabilityMarginsChunk(args):
+    freq, mag, phase, dB = args
+    n_systems = len(mag)
+    rows = np.arange(n_systems)
+    # non-finite samples are gaps, as in findStabilityMargins
+    valid = np.isfinite(freq) & np.isfinite(mag) & np.isfinite(phase)
+    pair = valid[:, :-1] & valid[:, 1:]
+    phase = _unwrapPhase(phase, valid)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # phase crossings of -180 + k*360 deg
+        band = np.floor((phase + 180) / 360)
+        phase_cross = pair & (band[:, :-1] != band[:, 1:])
+        level = -180 + 360 * np.maximum(band[:, :-1], band[:, 1:])
+        t_pc = (level - phase[:, :-1]) / (phase[:, 1:] - phase[:, :-1])
+        mag_pc = mag[:, :-1] + t_pc * (mag[:, 1:] - mag[:, :-1])
+        gain_margins = 0 - mag_pc if dB else 1 / mag_pc
+        gm_score = _marginScore(gain_margins, dB)
+        gm_score[~phase_cross] = np.inf
+        worst_pc = np.argmin(gm_score, axis=1)
+
+        # magnitude crossings of 0 dB, a sample exactly on 0 dB counts once and is read without its neighbour
+        unity = mag - (0 if dB else 1)
+        on_unity = valid & (unity == 0)
+        gain_cross = (pair & (unity[:, :-1] * unity[:, 1:] < 0)) | on_unity[:, :-1]
+        gain_cross[:, -1] |= on_unity[:, -1]
+        t_gc = np.where(on_unity[:, :-1], 0.0, unity[:, :-1] / (unity[:, :-1] - unity[:, 1:]))
+        t_gc[:, -1] = np.where(on_unity[:, -1], 1.0, t_gc[:, -1])
+        phase_gc = np.where(t_gc == 0, phase[:, :-1], np.where(t_gc == 1, phase[:, 1:],
+                            phase[:, :-1] + t_gc * (phase[:, 1:] - phase[:, :-1])))
+        phase_margins = np.remainder(phase_gc + 360, 360) - 180
+        pm_score = _marginScore(phase_margins)
+        pm_score[~gain_cross] = np.inf
+        worst_gc = np.argmin(pm_score, axis=1)
+
+    has_pc = np.isfinite(gm_score[rows, worst_pc])
+    has_gc = np.isfinite(pm_score[rows, worst_gc])
+    gm = np.where(has_pc, gain_margins[rows, worst_pc], np.nan)
+    pm = np.where(has_gc, phase_margins[rows, worst_gc], np.nan)
+    wg = np.full(n_systems, np.nan)
+    wp = np.full(n_systems, np.nan)
+    for freqs, i, t, has in ((wg, worst_pc, t_pc, has_pc), (wp, worst_gc, t_gc, has_gc)):
+        f1 = freq[rows, i]
+        f2 = freq[rows, np.minimum(i + 1, freq.shape[1] - 1)]
+        t_worst = t[rows, i]
+        with np.errstate(all="ignore"):
+            interpolated = np.where((f1 > 0) & (f2 > 0), f1 * (f2 / f1) ** t_worst, f1 + t_worst * (f2 - f1))
+        # crossings on a sample are read at that sample, its neighbour may be a gap
+        interpolated = np.where(t_worst == 0, f1, np.where(t_worst == 1, f2, interpolated))
+        freqs[has] = interpolated[has]
+    return gm, wg, pm, wp
+
+
+# index of the first sample of every segment that equals the reduced value of that segment
+def _firstIndexOfValue(y: np.ndarray, seg: np.ndarray, values: np.ndarray, starts: np.ndarray):
+    idx = np.flatnonzero(y == values[seg])
+    first = np.concatenate(([True], seg[idx][1:] != seg[idx][:-1]))
+    # segments with only NaN values keep their first sample
+    result = starts.copy()
+    result[seg[idx[first]]] = idx[first]
+    return result
+
+
+# small LRU cache of auxiliary line intersections keyed on (series id, data version, orientation, line value).
+# an entry of an older data version is dropped as soon as the series is looked up with a newer one
+class IntersectionCache:
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+    def get(self, key: tuple):
+        if key not in self.entries:
+            return None
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key: tuple, intersection_points: list):
+        series_id, version = key[0], key[1]
+        for stale_key in [k for k in self.entries if k[0] == series_id and k[1] != version]:
+            del self.entries[stale_key]
+        self.entries[key] = intersection_points
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def invalidateSeries(self, series_id: int):
+        for key in [k for k in self.entries if k[0] == series_id]:
+            del self.entries[key]
+
+
+# hit test index of the markers of a chart view. the positions of the auxiliary lines and of the vertical line
+# markers are kept sorted in axis coordinates (the log10 of the value on a log axis), where the value to pixel
+# map is affine, so the nearest line is found by bisection and the pixel tolerance covers the same distance on
+# linear and log axes. the measure lines are binned into a grid of plot area pixels that is rebuilt after the
+# chart transform changes. marker changes only mark their group stale, the group is rebuilt on the next query
+class MarkerHitIndex:
+    def __init__(self, chart_view: SmartChartView, cell_size: float = 32):
+        self.chart_view = chart_view
+        self.cell_size = cell_size
+        self.stale = {"aux_lines", "vlm", "measure"}
+        # log flags of the axes the line positions were computed for
+        self.axis_log = None
+        self.horizontal_lines = (np.empty(0), [])
+        self.vertical_lines = (np.empty(0), [])
+        self.vlm_lines = (np.empty(0), [])
+        # measure line end points in pixels, the markers and the grid cells with the indices of their segments
+        self.measure_segments = np.empty((0, 4))
+        self.measure_markers = []
+        self.measure_grid = {}
+        self.transform_version = None
+
+    def invalidate(self, *groups: str):
+        self.stale.update(groups or ("aux_lines", "vlm", "measure"))
+
+    @staticmethod
+    def _axisCoordinates(values, log: bool):
+        values = np.asarray(values, dtype=np.float64)
+        if log:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return np.log10(values)
+        return values
+
+    def _sortedLines(self, markers: list, values: list, log: bool):
+        positions = self._axisCoordinates(values, log)
+        keep = np.flatnonzero(np.isfinite(positions))
+        order = keep[np.argsort(positions[keep], kind="stable")]
+        return positions[order], [markers[i] for i in order]
+
+    def _refresh(self):
+        transform = self.chart_view.chart_transform
+        transform.update()
+        axis_log = (transform.x_log, transform.y_log)
+        if axis_log != self.axis_log:
+            self.axis_log = axis_log
+            self.stale.update(("aux_lines", "vlm"))
+        if "aux_lines" in self.stale:
+            lines = [al for al in self.chart_view.aux_line_dict.values() if al.aux_line_mode != "measure"]
+            horizontal = [al for al in lines if isinstance(al, HorizontalAuxLineMarker)]
+            vertical = [al for al in lines if isinstance(al, VerticalAuxLineMarker)]
+            self.horizontal_lines = self._sortedLines(horizontal, [al.y_value for al in horizontal], transform.y_log)
+            self.vertical_lines = self._sortedLines(vertical, [al.x_value for al in vertical], transform.x_log)
+        if "vlm" in self.stale:
+            vlms = [vlm for vlm in self.chart_view.vertical_marker_dict.values() if vlm.count() > 0]
+            self.vlm_lines = self._sortedLines(vlms, [vlm.at(0).x() for vlm in vlms], transform.x_log)
+        if "measure" in self.stale or self.transform_version != transform.version:
+            self._buildMeasureGrid()
+            self.transform_version = transform.version
+        self.stale.clear()
+
+    def _buildMeasureGrid(self):
+        self.measure_markers = [mm for mm in self.chart_view.measure_marker_dict.values() if mm.count() >= 2]
+        self.measure_grid = {}
+        if not self.measure_markers:
+            self.measure_segments = np.empty((0, 4))
+            return
+        ends = np.array([(mm.at(0).x(), mm.at(0).y(), mm.at(1).x(), mm.at(1).y()) for mm in self.measure_markers])
+        transform = self.chart_view.chart_transform
+        x1, y1 = transform.mapToPosition(ends[:, 0], ends[:, 1])
+        x2, y2 = transform.mapToPosition(ends[:, 2], ends[:, 3])
+        self.measure_segments = np.column_stack((x1, y1, x2, y2))
+        # only the cells of the plot area can be hovered, which bounds the cells of a long segment
+        plot_area = self.chart_view.chart().plotArea()
+        margin = self.chart_view.hit_tolerance
+        low = np.floor(np.array([plot_area.left() - margin, plot_area.top() - margin])/self.cell_size)
+        high = np.floor(np.array([plot_area.right() + margin, plot_area.bottom() + margin])/self.cell_size)
+        with np.errstate(invalid="ignore"):
+            cell_min = np.floor(np.column_stack((np.minimum(x1, x2), np.minimum(y1, y2)))/self.cell_size)
+            cell_max = np.floor(np.column_stack((np.maximum(x1, x2), np.maximum(y1, y2)))/self.cell_size)
+        cell_min = np.maximum(cell_min, low)
+        cell_max = np.minimum(cell_max, high)
+        for i in np.flatnonzero(np.all(np.isfinite(self.measure_segments), axis=1)):
+            for cx in range(int(cell_min[i, 0]), int(cell_max[i, 0]) + 1):
+                for cy in range(int(cell_min[i, 1]), int(cell_max[i, 1]) + 1):
+                    self.measure_grid.setdefault((cx, cy), []).append(i)
+
+    # nearest of the sorted lines to the axis coordinate, with its distance in pixels
+    @staticmethod
+    def _nearestLine(lines: tuple, position: float, scale: float):
+        positions, markers = lines
+        if not markers or not np.isfinite(position):
+            return None, np.inf
+        i = int(np.searchsorted(positions, position))
+        candidates = [j for j in (i - 1, i) if 0 <= j < len(markers)]
+        j = min(candidates, key=lambda j: abs(positions[j] - position))
+        return markers[j], abs(positions[j] - position)*abs(scale)
+
+    def nearestAuxiliaryLine(self, point: QPointF):
+        self._refresh()
+        transform = self.chart_view.chart_transform
+        x = self._axisCoordinates(point.x(), transform.x_log)
+        y = self._axisCoordinates(point.y(), transform.y_log)
+        horizontal, horizontal_dis = self._nearestLine(self.horizontal_lines, y, transform.y_scale)
+        vertical, vertical_dis = self._nearestLine(self.vertical_lines, x, transform.x_scale)
+        if horizontal_dis <= vertical_dis:
+            nearest, dis = horizontal, horizontal_dis
+        else:
+            nearest, dis = vertical, vertical_dis
+        return nearest if dis <= self.chart_view.hit_tolerance else None
+
+    def nearestVLM(self, x: float):
+        self._refresh()
+        transform = self.chart_view.chart_transform
+        vlm, dis = self._nearestLine(self.vlm_lines, self._axisCoordinates(x, transform.x_log), transform.x_scale)
+        return vlm if dis <= self.chart_view.hit_tolerance else None
+
+    def nearestMeasureMarker(self, point: QPointF):
+        self._refresh()
+        if not self.measure_grid:
+            return None
+        tolerance = self.chart_view.hit_tolerance
+        px, py = self.chart_view.chart_transform.mapToPosition(point.x(), point.y())
+        if not (np.isfinite(px) and np.isfinite(py)):
+            return None
+        candidates = set()
+        for cx in range(int(np.floor((px - tolerance)/self.cell_size)), int(np.floor((px + tolerance)/self.cell_size)) + 1):
+            for cy in range(int(np.floor((py - tolerance)/self.cell_size)), int(np.floor((py + tolerance)/self.cell_size)) + 1):
+                candidates.update(self.measure_grid.get((cx, cy), ()))
+        if not candidates:
+            return None
+        candidates = np.fromiter(candidates, dtype=np.intp)
+        x1, y1, x2, y2 = self.measure_segments[candidates].T
+        # distance from the point to each segment
+        dx, dy = x2 - x1, y2 - y1
+        length = dx*dx + dy*dy
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.clip(np.where(length > 0, ((px - x1)*dx + (py - y1)*dy)/length, 0), 0, 1)
+        dis = np.hypot(x1 + t*dx - px, y1 + t*dy - py)
+        i = int(np.argmin(dis))
+        return self.measure_markers[candidates[i]] if dis[i] <= tolerance else None
+
+
+# level of detail engine of a series, it keeps the full resolution data on the side and feeds the chart
+# only what the plot area shows. lines get the visible x range plus one neighbour on each side, min/max
+# decimated to the plot width once they have more samples than that, scatter series get the points inside
+# the visible rectangle. lines with unsorted x (e.g. nichols data) are pushed whole
+class SeriesLOD:
+    def __init__(self, x_data: np.ndarray, y_data: np.ndarray):
+        self.setData(x_data, y_data)
+
+    def setData(self, x_data: np.ndarray, y_data: np.ndarray):
+        self.x_data = x_data
+        self.y_data = y_data
+        # decimation needs sorted x, e.g. nichols data is not
+        self.monotonic = len(x_data) < 2 or bool(np.all(x_data[1:] >= x_data[:-1]))
+        # optional SeriesPyramid of the same data
+        self.pyramid = None
+        self.invalidate()
+
+    # take the data with samples appended at the end, without scanning the old samples again. returns
+    # True if the new samples may show in the chart, the next view is then pushed unless it culls to the
+    # same samples as before
+    def extend(self, x_data: np.ndarray, y_data: np.ndarray):
+        old_length = len(self.x_data)
+        self.x_data = x_data
+        self.y_data = y_data
+        if self.monotonic:
+            tail = x_data[max(old_length - 1, 0):]
+            self.monotonic = bool(np.all(tail[1:] >= tail[:-1]))
+            if not self.monotonic:
+                self.invalidate()
+        # the pyramid only covers the old samples
+        self.pyramid = None
+        # points that are all outside the culled rectangle leave the chart as it is
+        if self.last_rect is not None:
+            x_min, x_max, y_min, y_max = self.last_rect
+            x, y = x_data[old_length:], y_data[old_length:]
+            if not np.any((x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)):
+                return False
+        self.last_view = None
+        self.full_pushed = False
+        return True
+
+    # forget what was pushed to the chart, the next view is pushed whatever it is
+    def invalidate(self):
+        self.last_view = None
+        # sample range of a line that was culled without decimation
+        self.last_slice = None
+        # rectangle of the culled points
+        self.last_rect = None
+        # whether the chart holds the whole unsorted line
+        self.full_pushed = False
+
+    def setPyramid(self, pyramid: SeriesPyramid):
+        self.pyramid = pyramid
+        self.invalidate()
+
+    # return the decimated x,y arrays for the given view, or None if the view has not changed.
+    # with columns 0 the visible range is only culled, not decimated
+    def decimate(self, x_min: float, x_max: float, columns: int, log_x: bool = False):
+        view = (x_min, x_max, columns, log_x)
+        if view == self.last_view:
+            return None
+        self.last_view = view
+        if not self.monotonic:
+            # an unsorted line is pushed whole, panning and zooming do not change it
+            if self.full_pushed:
+                return None
+            self.full_pushed = True
+            return self.x_data, self.y_data
+        if columns < 1:
+            # the chart already holds this slice, e.g. while samples are appended outside the view
+            visible = _visibleSlice(self.x_data, x_min, x_max, log_x)
+            if visible == self.last_slice:
+                return None
+            self.last_slice = visible
+            return self.x_data[visible[0]:visible[1]], self.y_data[visible[0]:visible[1]]
+        self.last_slice = None
+        if self.pyramid is not None:
+            keep = self.pyramid.decimate(x_min, x_max, columns, log_x)
+            if keep is not None:
+                return self.x_data[keep], self.y_data[keep]
+        return decimateMinMax(self.x_data, self.y_data, x_min, x_max, columns, log_x)
+
+    # return the points inside the given rectangle, or None if the rectangle has not changed
+    def cull(self, x_min: float, x_max: float, y_min: float, y_max: float):
+        view = (x_min, x_max, y_min, y_max)
+        if view == self.last_view:
+            return None
+        self.last_view = view
+        self.last_rect = view
+        x, y = self.x_data, self.y_data
+        if self.monotonic:
+            start = int(np.searchsorted(x, x_min, side="left"))
+            stop = int(np.searchsorted(x, x_max, side="right"))
+            x, y = x[start:stop], y[start:stop]
+        inside = (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+        if inside.all():
+            return np.ascontiguousarray(x), np.ascontiguousarray(y)
+        return x[inside], y[inside]
+
+
+# multi resolution min/max summary of sorted x,y data. level k holds, for every block of min_block*2**k
+# samples, the index of the min and of the max y, each level is built from pairs of blocks of the level
+# below. the samples of a pixel column are covered by at most two aligned blocks per level plus a few
+# single samples, so a zoom gives the same first, last, min and max sample per column as decimateMinMax
+# in time proportional to the plot width times the number of levels, whatever the number of samples
+class SeriesPyramid:
+    # below this many visible samples per column a plain scan is as fast as the pyramid
+    scan_samples_per_column = 256
+
+    def __init__(self, x_data: np.ndarray, y_data: np.ndarray, min_block: int = 8):
+        self.x_data = x_data
+        self.y_data = y_data
+        self.min_block = min_block
+        self.levels = []
+        index_type = np.int32 if len(y_data) < 2**31 else np.int64
+        blocks = len(y_data) // min_block
+        if blocks == 0:
+            return
+        # NaN samples never win, as in decimateMinMax
+        y = y_data[:blocks*min_block].reshape(blocks, min_block)
+        nan = np.isnan(y)
+        offsets = np.arange(0, blocks*min_block, min_block, dtype=index_type)
+        min_idx = offsets + np.argmin(np.where(nan, np.inf, y), axis=1).astype(index_type)
+        max_idx = offsets + np.argmax(np.where(nan, -np.inf, y), axis=1).astype(index_type)
+        self.levels.append((min_idx, max_idx))
+        while len(min_idx) >= 2:
+            pairs = len(min_idx) // 2
+            min_idx = self._pick(min_idx[0:2*pairs:2], min_idx[1:2*pairs:2], np.less)
+            max_idx = self._pick(max_idx[0:2*pairs:2], max_idx[1:2*pairs:2], np.greater)
+            self.levels.append((min_idx, max_idx))
+
+    # per pair the index whose y wins the comparison, a NaN loses to any number
+    def _pick(self, left: np.ndarray, right: np.ndarray, wins):
+        y_left, y_right = self.y_data[left], self.y_data[right]
+        return np.where(wins(y_right, y_left) | np.isnan(y_left), right, left)
+
+    # sorted sample indices that draw x_min..x_max at the given number of columns, None if the visible range
+    # is short enough for decimateMinMax to scan it as fast
+    def decimate(self, x_min: float, x_max: float, columns: int, log_x: bool = False):
+        x_data = self.x_data
+        start, stop = _visibleSlice(x_data, x_min, x_max, log_x)
+        if log_x and (x_min <= 0 or x_max <= 0):
+            return None
+        if columns < 1 or x_max <= x_min or stop - start <= self.scan_samples_per_column * columns:
+            return None
+        # sample ranges of the pixel columns, the neighbours are columns of their own
+        if log_x:
+            edges = np.logspace(np.log10(x_min), np.log10(x_max), columns + 1)
+        else:
+            edges = np.linspace(x_min, x_max, columns + 1)
+        bounds = np.clip(np.searchsorted(x_data, edges, side="left"), start, stop)
+        # move the bounds by the rounding of the edges, so the columns are the ones of decimateMinMax
+        column = np.arange(columns + 1)
+        for _ in range(2):
+            bounds -= (bounds > start) & (self._column(bounds - 1, x_min, x_max, columns, log_x) >= column)
+            bounds += (bounds < stop) & (self._column(bounds, x_min, x_max, columns, log_x) < column)
+        bounds = np.unique(np.concatenate(([start], bounds, [stop])))
+        first, end = bounds[:-1], bounds[1:]
+        min_idx, max_idx = self._rangeExtrema(first, end)
+        return np.unique(np.concatenate((first, end - 1, min_idx, max_idx)))
+
+    # pixel column of the samples at the given indices, computed as in decimateMinMax
+    def _column(self, indices: np.ndarray, x_min: float, x_max: float, columns: int, log_x: bool):
+        x = self.x_data[np.clip(indices, 0, len(self.x_data) - 1)]
+        if log_x:
+            log_min = np.log10(x_min)
+            return np.floor((np.log10(x) - log_min) * (columns / (np.log10(x_max) - log_min)))
+        return np.floor((x - x_min) * (columns / (x_max - x_min)))
+
+    # index of the min and of the max y of every sample range first[i]..end[i]-1
+    def _rangeExtrema(self, first: np.ndarray, end: np.ndarray):
+        block = self.min_block
+        group = np.arange(len(first))
+        # single samples before the first and after the last aligned block of each range
+        low = np.minimum(-(-first // block) * block, end)
+        high = np.maximum(end // block * block, low)
+        offsets = np.arange(block - 1)
+        head = first[:, None] + offsets
+        tail = high[:, None] + offsets
+        head_ok, tail_ok = head < low[:, None], tail < end[:, None]
+        groups = [np.broadcast_to(group[:, None], head.shape)[head_ok],
+                  np.broadcast_to(group[:, None], tail.shape)[tail_ok]]
+        min_candidates = [head[head_ok], tail[tail_ok]]
+        max_candidates = list(min_candidates)
+        # aligned blocks, the range ends move up one level whenever they are even multiples of the block
+        low, high = low // block, high // block
+        for min_level, max_level in self.levels:
+            active = low < high
+            if not active.any():
+                break
+            left = active & (low % 2 == 1)
+            right = active & (high % 2 == 1) & (high - 1 >= low + left)
+            for take, blocks in ((left, low), (right, high - 1)):
+                groups.append(group[take])
+                min_candidates.append(min_level[blocks[take]])
+                max_candidates.append(max_level[blocks[take]])
+            low = (low + left) // 2
+            high = (high - right) // 2
+        groups = np.concatenate(groups)
+        return (self._groupExtremum(groups, np.concatenate(min_candidates), 1.0, len(first)),
+                self._groupExtremum(groups, np.concatenate(max_candidates), -1.0, len(first)))
+
+    # candidate with the smallest sign*y of every group, NaN only if the group has nothing else
+    def _groupExtremum(self, groups: np.ndarray, candidates: np.ndarray, sign: float, count: int):
+        order = np.lexsort((sign * self.y_data[candidates], groups))
+        groups, candidates = groups[order], candidates[order]
+        leading = np.concatenate(([True], groups[1:] != groups[:-1]))
+        return candidates[leading].astype(np.int64)
+
+
+_pyramid_executor = None
+
+
+# one background thread builds the pyramids, numpy releases the GIL for most of the work
+def _pyramidExecutor():
+    global _pyramid_executor
+    if _pyramid_executor is None:
+        _pyramid_executor = ThreadPoolExecutor(max_workers=1)
+    return _pyramid_executor
+
+
 # customize the qlineseries
 class SmartLineSeries(QLineSeries):
     instance_count = 0
-    id_pool = set()
+    id_allocator = IdAllocator()
+    # emitted from the pyramid thread with the data version the pyramid was built for
+    pyramid_ready = Signal(int)
     # init
 
     def __init__(self, chart_view: SmartChartView, label: str = ""):
@@ -1722,31 +2484,128 @@ class SmartLineSeries(QLineSeries):
         self.interval = 0
         self.interpolated_series = None
         self.interpolated_flag = False
+        self.series_data = SeriesData()
+        self.lod = None
+        # large data is summarized in a SeriesPyramid when use_pyramid is set
+        self.use_pyramid = False
+        self.pyramid_future = None
+        # set while the pyramid waits for appending to go idle
+        self.pyramid_stale = False
+        self.pyramid_ready.connect(self.setPyramid)
 
     def setupID(self):
-        # assign an id and try from 1,2,3,4,5... until an id is not in the id_pool
-        id = 1
-        while True:
-            if id not in SmartLineSeries.id_pool:
-                SmartLineSeries.id_pool.add(id)
-                break
-            id = id + 1
-        self.id = id
+        # assign the smallest free id
+        self.id = SmartLineSeries.id_allocator.allocate()
 
     def addData(self, x: float, y: float):
-        self.append(x, y)
+        self.series_data.append(x, y)
+        if self.lod is None:
+            self.pushSeriesData()
+            return
+        # the visible range is culled or decimated again once per frame, a line whose culled slice does
+        # not change is left as it is
+        if self.lod.extend(self.series_data.x_data, self.series_data.y_data):
+            self.chart_view.scheduleUpdate("series_lod")
+        if self.use_pyramid:
+            self.schedulePyramid()
         # if self.count()>1:
         #     self.interval = self.at(self.count()-1).x()-self.at(self.count()-2).x()
 
     # update the series with x,y data given
     def updateSeries(self, x_data: list, y_data: list):
-        self.clear()
-        for i in range(len(x_data)):
-            self.append(x_data[i], y_data[i])
+        # anything but plain python lists goes through the bulk numpy path
+        if not (isinstance(x_data, list) and isinstance(y_data, list)):
+            self.updateSeriesNp(x_data, y_data)
+            return
+        self.series_data.setData(x_data, y_data)
+        self.pushSeriesData()
         self.setName(f"{self.label}")
         if len(x_data) > 0:
             self.interval = x_data[1]-x_data[0]
 
+    # update the series with numpy arrays, all points are pushed to Qt in one replace call
+    def updateSeriesNp(self, x_data: np.ndarray, y_data: np.ndarray):
+        self.series_data.setData(x_data, y_data)
+        self.pushSeriesData()
+        self.setName(f"{self.label}")
+        if len(self.series_data) > 1:
+            self.interval = float(self.series_data.x_data[1]-self.series_data.x_data[0])
+
+    # push the visible part of the stored data to Qt, large series are decimated to the plot width as well.
+    # data that keeps changing, e.g. a stream, defers its pyramid until the changes stop
+    def pushSeriesData(self, defer_pyramid: bool = False):
+        x_data, y_data = self.series_data.x_data, self.series_data.y_data
+        if self.lod is None:
+            self.lod = SeriesLOD(x_data, y_data)
+        else:
+            self.lod.setData(x_data, y_data)
+        if self.needsPyramid():
+            if defer_pyramid:
+                self.schedulePyramid()
+            else:
+                self.buildPyramid()
+        self.updateLOD()
+
+    def needsPyramid(self):
+        return (self.use_pyramid and self.lod is not None and self.lod.monotonic and
+                len(self.series_data) > self.chart_view.lod_point_threshold)
+
+    # build the pyramid once the data has not changed for pyramid_idle_delay ms, instead of one build per change
+    def schedulePyramid(self):
+        if self.pyramid_future is not None:
+            self.pyramid_future.cancel()
+        self.pyramid_stale = True
+        self.chart_view.pyramid_timer.start(self.chart_view.pyramid_idle_delay)
+
+    # summarize the data in a pyramid, in the background thread if the chart view asks for it.
+    # zooms use the plain decimation until the pyramid of the current data is ready
+    def buildPyramid(self):
+        x_data, y_data = self.series_data.x_data, self.series_data.y_data
+        version = self.series_data.version
+        self.pyramid_stale = False
+        if self.pyramid_future is not None:
+            self.pyramid_future.cancel()
+        if not self.chart_view.pyramid_background:
+            self.pyramid_future = None
+            self.lod.setPyramid(SeriesPyramid(x_data, y_data))
+            return
+        self.pyramid_future = _pyramidExecutor().submit(SeriesPyramid, x_data, y_data)
+        self.pyramid_future.add_done_callback(lambda future: self._pyramidDone(future, version))
+
+    # runs in the pyramid thread, the signal hands the result over to the gui thread
+    def _pyramidDone(self, future, version: int):
+        if future.cancelled() or future.exception() is not None:
+            return
+        try:
+            self.pyramid_ready.emit(version)
+        except RuntimeError:
+            # the series was deleted while the pyramid was built
+            pass
+
+    def setPyramid(self, version: int):
+        future = self.pyramid_future
+        if future is None or not future.done() or version != self.series_data.version:
+            return
+        self.pyramid_future = None
+        self.lod.setPyramid(future.result())
+        self.updateLOD()
+
+    # push the culled, and for large series decimated, visible x range to the chart
+    def updateLOD(self):
+        if self.lod is None:
+            return
+        x_axis = self.chart_view.x_axis
+        # bode plots bin the samples in log10(x) columns
+        log_x = x_axis.type() == QAbstractAxis.AxisType.AxisTypeLogValue
+        # small series are only culled and stay at full detail while navigating
+        if len(self.lod.x_data) > self.chart_view.lod_point_threshold:
+            columns = self.chart_view.decimationColumns()
+        else:
+            columns = 0
+        decimated = self.lod.decimate(x_axis.min(), x_axis.max(), columns, log_x)
+        if decimated is not None:
+            self.replaceNp(*decimated)
+
     def updateProperty(self):
         if self.chart_view.interpolated_series_step <= 0:
             self.interpolated_series = self
@@ -1754,7 +2613,7 @@ class SmartLineSeries(QLineSeries):
         elif self.chart_view.interpolated_series_step >= self.interval:
             self.interpolated_series = self
             self.interpolated_flag = False
-        elif self.count() > 100:
+        elif len(self.series_data) > 100:
             self.interpolated_series = self
             self.interpolated_flag = False
         else:
@@ -1762,13 +2621,14 @@ class SmartLineSeries(QLineSeries):
             self.interpolated_flag = True
 
     def _interpolateSeries(self, step: float):
-        if self.count() == 0:
+        if len(self.series_data) == 0:
             return None
-        if self.count() == 1:
+        if len(self.series_data) == 1:
             return self
         self.interpolated_series = SmartLineSeries(self)
-        x_min = self.at(0).x()
-        x_max = self.at(self.count()-1).x()
+        # the chart only holds the visible points, interpolate the stored data
+        x_min = float(self.series_data.x_data[0])
+        x_max = float(self.series_data.x_data[-1])
         x = x_min
         while x <= x_max:
             y = self._interpolate_y_value(self, x)
@@ -1776,36 +2636,136 @@ class SmartLineSeries(QLineSeries):
             x = x + step
 
     def _interpolate_y_value(self, lineseries: QLineSeries, x_value):
-        points = [(p.x(), p.y()) for p in lineseries.pointsVector()]
-        if not points:
+        x_data, y_data = _seriesArrays(lineseries)
+        if len(x_data) == 0:
             return None
 
         # If x_value is out of range, return the nearest point's y-value
-        if x_value < points[0][0]:
+        if x_value < x_data[0]:
             return None
-        if x_value > points[-1][0]:
+        if x_value > x_data[-1]:
             return None
 
-        for i in range(len(points) - 1):
-            x1, y1 = points[i]
-            x2, y2 = points[i + 1]
-
-            if x1 <= x_value <= x2:
-                # Linear interpolation
-                y_value = y1 + (x_value - x1) * (y2 - y1) / (x2 - x1)
-                return y_value
-        return None
+        # first segment that contains x_value
+        segments = np.flatnonzero((x_data[:-1] <= x_value) & (x_value <= x_data[1:]))
+        if len(segments) == 0:
+            return None
+        i = segments[0]
+        x1, y1 = x_data[i], y_data[i]
+        x2, y2 = x_data[i + 1], y_data[i + 1]
+        if x2 == x1:
+            return float(y1)
+        # Linear interpolation
+        return float(y1 + (x_value - x1) * (y2 - y1) / (x2 - x1))
 
     def _isNegValueContained(self):
-        for point in self.points():
-            if point.y() < 0:
-                return True
-        return False
+        return bool(np.any(self.series_data.y_data < 0))
+
+
+# fixed capacity ring buffer of x,y samples, the oldest samples are dropped when it is full
+class RingBuffer:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.x_data = np.empty(capacity)
+        self.y_data = np.empty(capacity)
+        self.clear()
+
+    def clear(self):
+        self.start = 0
+        self.size = 0
+        self._bounds = [np.inf, -np.inf, np.inf, -np.inf]
+        self._bounds_valid = True
+
+    # append one sample or arrays of samples
+    def extend(self, x, y):
+        x = np.atleast_1d(np.asarray(x, dtype=np.float64))
+        y = np.atleast_1d(np.asarray(y, dtype=np.float64))
+        if len(x) > self.capacity:
+            x = x[-self.capacity:]
+            y = y[-self.capacity:]
+        n = len(x)
+        if n == 0:
+            return
+
+        # samples that are overwritten may have been the min or max of the buffer
+        evicted = max(self.size + n - self.capacity, 0)
+        if evicted > 0 and self._bounds_valid:
+            old_x, old_y = self._slice(0, evicted)
+            min_x, max_x, min_y, max_y = self._bounds
+            # NaN samples never set the bounds, an all NaN block compares False and keeps them
+            if (np.fmin.reduce(old_x) <= min_x or np.fmax.reduce(old_x) >= max_x or
+                    np.fmin.reduce(old_y) <= min_y or np.fmax.reduce(old_y) >= max_y):
+                self._bounds_valid = False
+
+        # write at most two contiguous blocks
+        end = (self.start + self.size) % self.capacity
+        first = min(n, self.capacity - end)
+        self.x_data[end:end + first] = x[:first]
+        self.y_data[end:end + first] = y[:first]
+        self.x_data[:n - first] = x[first:]
+        self.y_data[:n - first] = y[first:]
+        self.start = (self.start + evicted) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+        if self._bounds_valid:
+            # fmin/fmax skip NaN samples, e.g. dropouts in the stream
+            self._bounds = [np.fmin(self._bounds[0], np.fmin.reduce(x)), np.fmax(self._bounds[1], np.fmax.reduce(x)),
+                            np.fmin(self._bounds[2], np.fmin.reduce(y)), np.fmax(self._bounds[3], np.fmax.reduce(y))]
+
+    def _slice(self, offset: int, length: int):
+        begin = (self.start + offset) % self.capacity
+        if begin + length <= self.capacity:
+            return self.x_data[begin:begin + length], self.y_data[begin:begin + length]
+        index = np.arange(begin, begin + length) % self.capacity
+        return self.x_data[index], self.y_data[index]
+
+    # the buffered samples in the order they were appended
+    def data(self):
+        return self._slice(0, self.size)
+
+    # (min_x, max_x, min_y, max_y) of the buffered samples
+    def bounds(self):
+        if not self._bounds_valid:
+            x, y = self.data()
+            self._bounds = [np.fmin.reduce(x, initial=np.inf), np.fmax.reduce(x, initial=-np.inf),
+                            np.fmin.reduce(y, initial=np.inf), np.fmax.reduce(y, initial=-np.inf)]
+            self._bounds_valid = True
+        return tuple(self._bounds)
+
+
+# line series for live data, samples are collected in a ring buffer and pushed to Qt in batches
+class SmartStreamingSeries(SmartLineSeries):
+    def __init__(self, chart_view: SmartChartView, label: str = "", capacity: int = 100000):
+        super().__init__(chart_view, label)
+        self.buffer = RingBuffer(capacity)
+        self.dirty = False
+
+    # append one sample or arrays of samples, they are shown with the next flush
+    def appendData(self, x, y):
+        self.buffer.extend(x, y)
+        self.dirty = True
+
+    def addData(self, x: float, y: float):
+        self.appendData(x, y)
+
+    def updateSeries(self, x_data, y_data):
+        self.buffer.clear()
+        self.appendData(x_data, y_data)
+        self.flush()
+        self.setName(f"{self.label}")
+
+    # push the buffered samples to Qt
+    def flush(self):
+        # setData copies, data() may return views of the ring that the next extend overwrites
+        self.series_data.setData(*self.buffer.data())
+        self.pushSeriesData(defer_pyramid=True)
+        self.dirty = False
 
 
 class SmartScatterSeries(QScatterSeries):
     instance_count = 0
-    id_pool = set()
+    # share the id space with SmartLineSeries
+    id_allocator = SmartLineSeries.id_allocator
     # init
 
     def __init__(self, chart_view: SmartChartView, label: str = ""):
@@ -1815,32 +2775,74 @@ class SmartScatterSeries(QScatterSeries):
         self.label = label
         self.setMarkerSize(5)
         self.setupID()
+        self.series_data = SeriesData()
+        self.lod = None
 
     def setupID(self):
-        # assign an id and try from 1,2,3,4,5... until an id is not in the id_pool
-        id = 1
-        while True:
-            # share id_pool with SmartLineSeries
-            if (id not in SmartLineSeries.id_pool) and (id not in SmartScatterSeries.id_pool):
-                SmartScatterSeries.id_pool.add(id)
-                break
-            id = id + 1
-        self.id = id
+        # assign the smallest free id, shared with SmartLineSeries
+        self.id = SmartScatterSeries.id_allocator.allocate()
 
     # add data
     def addData(self, x: float, y: float):
-        self.append(x, y)
+        self.series_data.append(x, y)
+        if self.lod is None:
+            self.pushSeriesData()
+        elif self.lod.extend(self.series_data.x_data, self.series_data.y_data):
+            # the point is inside the culled rectangle, the points are culled again with the next frame
+            self.chart_view.scheduleUpdate("series_lod")
 
     def updateSeries(self, x_data: list, y_data: list):
-        self.clear()
-        for i in range(len(x_data)):
-            self.append(x_data[i], y_data[i])
+        # anything but plain python lists goes through the bulk numpy path
+        if not (isinstance(x_data, list) and isinstance(y_data, list)):
+            self.updateSeriesNp(x_data, y_data)
+            return
+        self.series_data.setData(x_data, y_data)
+        self.pushSeriesData()
+        self.setName(f"My Series {self.label}")
+
+    # update the series with numpy arrays, all points are pushed to Qt in one replace call
+    def updateSeriesNp(self, x_data: np.ndarray, y_data: np.ndarray):
+        self.series_data.setData(x_data, y_data)
+        self.pushSeriesData()
         self.setName(f"My Series {self.label}")
 
+    # push the points of the stored data that are inside the plot area to Qt
+    def pushSeriesData(self):
+        if self.lod is None:
+            self.lod = SeriesLOD(self.series_data.x_data, self.series_data.y_data)
+        else:
+            self.lod.setData(self.series_data.x_data, self.series_data.y_data)
+        self.updateLOD()
+
+    def updateLOD(self):
+        if self.lod is None:
+            return
+        # keep the points whose marker still reaches into the plot area
+        plot_area = self.chart_view.chart().plotArea()
+        radius = self.markerSize() / 2
+        x_min, x_max = self._paddedRange(self.chart_view.x_axis, radius / max(plot_area.width(), 1))
+        y_min, y_max = self._paddedRange(self.chart_view.y_axis, radius / max(plot_area.height(), 1))
+        culled = self.lod.cull(x_min, x_max, y_min, y_max)
+        if culled is not None:
+            self.replaceNp(*culled)
+
+    # axis range widened by the given fraction of its length on both sides, in log10 on a log axis
+    @staticmethod
+    def _paddedRange(axis: QAbstractAxis, fraction: float):
+        low, high = axis.min(), axis.max()
+        if axis.type() == QAbstractAxis.AxisType.AxisTypeLogValue and low > 0:
+            factor = (high / low) ** fraction
+            return low / factor, high * factor
+        pad = (high - low) * fraction
+        return low - pad, high + pad
+
+    def _isNegValueContained(self):
+        return bool(np.any(self.series_data.y_data < 0))
+
 
 class VerticalLineMarker(QLineSeries):
     instance_count = 0
-    id_pool = set()
+    id_allocator = IdAllocator()
 
     def __init__(self, chart_view: SmartChartView, series: QLineSeries, x_value: float, vlm_circle_radius: float = 5):
         super().__init__()
@@ -1890,19 +2892,14 @@ class VerticalLineMarker(QLineSeries):
 
         # add the VLM to the vertical_marker_dict
         self.chart_view.vertical_marker_dict[self.id] = self
+        self.chart_view.hit_index.invalidate("vlm")
 
         self.extended = False
         self.extended_vlm = None
 
     def setupID(self):
-        # assign an id and try from 1,2,3,4,5... until an id is not in the id_pool
-        id = 1
-        while True:
-            if id not in VerticalLineMarker.id_pool:
-                VerticalLineMarker.id_pool.add(id)
-                break
-            id = id + 1
-        self.id = id
+        # assign the smallest free id
+        self.id = VerticalLineMarker.id_allocator.allocate()
 
     def showVLM(self):
         self.setVisible(True)
@@ -1920,7 +2917,7 @@ class VerticalLineMarker(QLineSeries):
         series_min_x, series_max_x = self._get_min_max_x_values(self.series)
 
         # limit the x_value to the range of the series if enabled
-        if self.chart_view.marker_limit_range_to_series:
+        if self.chart_view.marker_limit_range_to_series and series_min_x is not None:
             if x_value < series_min_x:
                 x_value = series_min_x
             elif x_value > series_max_x:
@@ -1930,6 +2927,7 @@ class VerticalLineMarker(QLineSeries):
         self.clear()
         self.append(x_value, min_y)
         self.append(x_value, max_y)
+        self.chart_view.hit_index.invalidate("vlm")
         self.last_vertical_line_x_pos = x_value
         self.last_vertical_line_x_percent = (x_value-min_x) / (max_x-min_x)
         if not circular_marker_hide:
@@ -1952,13 +2950,15 @@ class VerticalLineMarker(QLineSeries):
                 self.chart_view.nichols_frequency_series, i, ratio)
         if y_value is not None:
             if self.chart_view.plot_type == "nichols" and ratio is not None and self.chart_view.nichols_frequency_series is not None:
+                # the frequency series may not cover the segment, e.g. at a gap in its data
+                freq_text = "--" if freq_y_value is None else f"{freq_y_value:.2f}"
                 if not text_not_update:
                     self.text_item.setPlainText(
-                        f"({x_value:.2f},{y_value:.2f}),freq:{freq_y_value:.2f}")
+                        f"({x_value:.2f},{y_value:.2f}),freq:{freq_text}")
             else:
                 if not text_not_update:
                     self.text_item.setPlainText(f"({x_value:.2f},{y_value:.2f})")
-            text_pos = self.chart().mapToPosition(QPointF(x_value, y_value)) + QPointF(10, -20)  # Adjust the offset as needed
+            text_pos = self._convertPointFromChartViewtoViewPort(QPointF(x_value, y_value)) + QPointF(10, -20)  # Adjust the offset as needed
             self.text_item.setPos(text_pos)
         else:
             if not text_not_update:
@@ -1973,57 +2973,56 @@ class VerticalLineMarker(QLineSeries):
         self.extended_vlm = None
 
     def _convertPointFromChartViewtoViewPort(self, point: QPointF):
-        top_point = self.chart_view.chart().mapToPosition(point)
-        top_point_in_scene = self.chart_view.mapToScene(top_point.toPoint())
-        top_point_viewport_position = self.chart_view.mapFromScene(
-            top_point_in_scene)
-        return top_point_viewport_position
+        return self.chart_view.chart_transform.mapPointToViewport(point)
 
     def _get_min_max_x_values(self, series: QLineSeries):
-        if not series.points():
+        if hasattr(series, "series_data"):
+            bounds = series.series_data.bounds()
+            if bounds is None:
+                return None, None
+            return bounds[0], bounds[1]
+
+        x_data, _ = _seriesArrays(series)
+        if len(x_data) == 0:
             return None, None
-
-        min_x = float("inf")
-        max_x = float("-inf")
-
-        for point in series.points():
-            min_x = min(min_x, point.x())
-            max_x = max(max_x, point.x())
-
-        return min_x, max_x
+        return np.min(x_data), np.max(x_data)
 
     def _interpolate_y_value(self, lineseries: QLineSeries, x_value):
-        points = [(p.x(), p.y()) for p in lineseries.pointsVector()]
-        if not points:
+        x_data, y_data = _seriesArrays(lineseries)
+        if len(x_data) == 0:
             return None, None, None
-        min_x = min(points[0][0], points[-1][0])
-        max_x = max(points[0][0], points[-1][0])
+        min_x = min(x_data[0], x_data[-1])
+        max_x = max(x_data[0], x_data[-1])
         # If x_value is out of range, return the nearest point's y-value
         if x_value < min_x:
             return None, None, None
         if x_value > max_x:
             return None, None, None
 
-        for i in range(len(points) - 1):
-            x1, y1 = points[i]
-            x2, y2 = points[i + 1]
-            point_left_x = min(x1, x2)
-            point_right_x = max(x1, x2)
-            if point_left_x <= x_value <= point_right_x:
-                # Linear interpolation
-                y_value = y1 + (x_value - x1) * (y2 - y1) / (x2 - x1)
-                ratio = (x_value - point_left_x)/(point_right_x-point_left_x)
-                return y_value, ratio, i
-
-        return None, None, None
+        # first segment whose x span contains x_value, the index is cached by the data store
+        if hasattr(lineseries, "series_data"):
+            i = lineseries.series_data.findSegment(x_value)
+        else:
+            i = SeriesData(x_data, y_data).findSegment(x_value)
+        if i is None:
+            return None, None, None
+        x1, y1 = x_data[i], y_data[i]
+        x2, y2 = x_data[i + 1], y_data[i + 1]
+        if x2 == x1:
+            return float(y1), 0.0, i
+        # Linear interpolation
+        y_value = y1 + (x_value - x1) * (y2 - y1) / (x2 - x1)
+        ratio = (x_value - min(x1, x2))/abs(x2-x1)
+        return float(y_value), float(ratio), i
 
     def _interpolate_freq_value(self, lineseries: QLineSeries, i: int, ratio: float):
-        points = [(p.x(), p.y()) for p in lineseries.pointsVector()]
-        if not points:
+        if i + 1 >= lineseries.count():
             return None
 
-        x1, y1 = points[i]
-        x2, y2 = points[i + 1]
+        y1 = lineseries.at(i).y()
+        y2 = lineseries.at(i + 1).y()
+        if not (math.isfinite(y1) and math.isfinite(y2)):
+            return None
         point_left_y = min(y1, y2)
         point_right_y = max(y1, y2)
         # Linear interpolation
@@ -2031,76 +3030,410 @@ class VerticalLineMarker(QLineSeries):
         return y_value
 
 
+# sample angles (deg) along the m and n circles, denser where the contours bend sharply on the nichols chart
+_M_CIRCLE_SAMPLES = np.concatenate(
+    (np.arange(0, 10, .1), np.arange(10, 350, 1), np.arange(350, 360, 0.1)))
+_N_CIRCLE_SAMPLES = np.concatenate(
+    (np.arange(0, 5, .1), np.arange(5, 355, 1), np.arange(355, 360, 0.1)))
+# imaginary parts along the 0 dB m circle, which degenerates into the line re = -1/2
+_M_UNITY_SAMPLES = np.concatenate(
+    (np.arange(-100, -5, 1), np.arange(-5, 5, .01), np.arange(5, 100, 1)))
+
+
+# sample array with density-1 extra samples linearly spaced between every pair of samples
+def _refineSamples(samples: np.ndarray, density: int):
+    if density <= 1:
+        return samples
+    return np.interp(np.arange((len(samples)-1)*density + 1)/density, np.arange(len(samples)), samples)
+
+
+# open loop (phase in deg, magnitude) contours of constant closed loop magnitude, one per entry of
+# magnitudes. all circles are evaluated in one broadcast over (len(magnitudes), n_samples)
+def calculateMContours(magnitudes, density: int = 1):
+    magnitudes = np.asarray(magnitudes, dtype=np.float64)
+    circle_samples = _refineSamples(_M_CIRCLE_SAMPLES, density)
+    contours = [None] * len(magnitudes)
+    circle = magnitudes != 1
+    m = magnitudes[circle, None]
+    centers = -m**2/(m**2-1)
+    radius = np.abs(m/(m**2-1))
+    points = centers + radius * np.exp(1j*np.radians(circle_samples))
+    angles = np.unwrap(np.angle(points, deg=True), period=360, discont=180, axis=1)
+    mags = np.abs(points)
+    for row, index in enumerate(np.flatnonzero(circle)):
+        contours[index] = (angles[row], mags[row])
+    if not circle.all():
+        points = -1/2 + _refineSamples(_M_UNITY_SAMPLES, density)*1j
+        angle = np.unwrap(np.angle(points, deg=True), period=360, discont=180)
+        for index in np.flatnonzero(~circle):
+            contours[index] = (angle, np.abs(points))
+    return contours
+
+
+# open loop (phase in deg, magnitude) contours of constant closed loop phase, one per entry of phases.
+# points below -40 dB are dropped and each contour is closed with two points far below the chart
+def calculateNContours(phases, density: int = 1):
+    circle_samples = _refineSamples(_N_CIRCLE_SAMPLES, density)
+    N = np.tan(np.radians(np.asarray(phases, dtype=np.float64)))[:, None]
+    radius = np.sqrt(1/4+(1/(2*N))**2)
+    points = (-1/2 + 1j/(2*N)) + radius * np.exp(1j*np.radians(circle_samples))
+    mags = np.abs(points)
+    angles = np.angle(points, deg=True)
+    with np.errstate(divide="ignore"):
+        keep = (circle_samples != 270) & ~((mags == 0) & (angles == 0)) & (20*np.log10(mags) >= -40)
+    contours = []
+    for angle, mag, mask in zip(angles, mags, keep):
+        angle = np.unwrap(angle[mask], period=360, discont=180)
+        contours.append((np.concatenate((angle, [angle.min()-0.1, angle.max()+0.1])),
+                         np.concatenate((mag[mask], [10**(-1000/20)]*2))))
+    return contours
+
+
+# canonical nichols contours shared by every chart in the process, keyed on (kind, levels, density).
+# with persistence enabled they are also kept in an .npz file next to the package across sessions
+_nichols_contour_cache = {}
+nichols_contour_persist = False
+_NICHOLS_CONTOUR_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nichols_contours.npz")
+# bump when the contour sampling changes so stale files are not reused
+_NICHOLS_CONTOUR_VERSION = 1
+
+
+# contours of the m circles (kind "m", levels in dB) or n circles (kind "n", levels in deg) from the
+# process wide cache. the returned arrays are read only, shift them with shiftNicholsPhase
+def getNicholsContours(kind: str, levels, persist: bool = None, density: int = 1):
+    if persist is None:
+        persist = nichols_contour_persist
+    key = (kind, tuple(float(level) for level in levels), int(density))
+    if key in _nichols_contour_cache:
+        return _nichols_contour_cache[key]
+
+    contours = _loadNicholsContours(key) if persist else None
+    # only contours that are not in the file yet are written to it
+    computed = contours is None
+    if computed:
+        if kind == "m":
+            contours = calculateMContours(10**(np.array(key[1])/20), key[2])
+        elif kind == "n":
+            contours = calculateNContours(key[1], key[2])
+        else:
+            raise ValueError(f"unknown nichols contour kind {kind}")
+    for angle_array, mag_array in contours:
+        angle_array.flags.writeable = False
+        mag_array.flags.writeable = False
+    _nichols_contour_cache[key] = contours
+    if persist and computed:
+        _saveNicholsContours(key, contours)
+    return contours
+
+
+# name prefix of a cache entry inside the .npz file
+def _nicholsContourName(key):
+    kind, levels, density = key
+    return f"v{_NICHOLS_CONTOUR_VERSION}_{kind}{density}_" + "_".join(repr(level) for level in levels)
+
+
+def _loadNicholsContours(key):
+    if not os.path.exists(_NICHOLS_CONTOUR_FILE):
+        return None
+    name = _nicholsContourName(key)
+    try:
+        with np.load(_NICHOLS_CONTOUR_FILE) as stored:
+            return [(stored[f"{name}_{i}_phase"], stored[f"{name}_{i}_mag"])
+                    for i in range(len(key[1]))]
+    except (OSError, ValueError, KeyError):
+        # missing entry or unreadable file, the contours are computed again
+        return None
+
+
+# add the contours of one key to the file. the entries stored by other runs are kept, and the file is
+# written next to the old one and swapped in, so a reader never sees it half written
+def _saveNicholsContours(key, contours):
+    prefix = f"v{_NICHOLS_CONTOUR_VERSION}_"
+    arrays = {}
+    try:
+        with np.load(_NICHOLS_CONTOUR_FILE) as stored:
+            # entries of older contour versions are dropped
+            arrays = {name: stored[name] for name in stored.files if name.startswith(prefix)}
+    except (OSError, ValueError):
+        # no file yet or an unreadable one, it is replaced
+        pass
+    name = _nicholsContourName(key)
+    for i, (angle_array, mag_array) in enumerate(contours):
+        arrays[f"{name}_{i}_phase"] = angle_array
+        arrays[f"{name}_{i}_mag"] = mag_array
+    temp_file = f"{_NICHOLS_CONTOUR_FILE}.{os.getpid()}.tmp"
+    try:
+        with open(temp_file, "wb") as file:
+            np.savez(file, **arrays)
+        os.replace(temp_file, _NICHOLS_CONTOUR_FILE)
+    except OSError:
+        # read only installs simply keep the in-memory cache
+        try:
+            os.remove(temp_file)
+        except OSError:
+            pass
+
+
+# closed loop T = G/(1+G) of unity feedback at the open loop nichols coordinates (phase in deg, magnitude in dB)
+def nicholsClosedLoop(phase, mag_db):
+    open_loop = 10**(np.asarray(mag_db, dtype=np.float64)/20) * np.exp(1j*np.radians(phase))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return open_loop/(1 + open_loop)
+
+
+# shift the phase array by a multiple of 360 deg so that it overlaps the -180+k*360 center, returns a copy
+def shiftNicholsPhase(center: float, phase_array: np.ndarray):
+    phase_array = np.asarray(phase_array, dtype=np.float64)
+    return phase_array + _nicholsPhaseOffset(center, phase_array.min(), phase_array.max())
+
+
+# multiple of 360 deg that shiftNicholsPhase adds to a phase array spanning [min_phase, max_phase]
+def _nicholsPhaseOffset(center: float, min_phase: float, max_phase: float):
+    if min_phase - center >= 180:
+        return -360*(np.floor((min_phase - center - 180)/360) + 1)
+    if max_phase - center <= -180:
+        return 360*(np.floor((center - 180 - max_phase)/360) + 1)
+    return 0.0
+
+
+# painter path with one subpath per (x, y) contour. the path is streamed in through QDataStream so no
+# per point python call is needed, the layout matches Qt's QPainterPath serialization
+def _contoursToPath(contours: list):
+    path = QPainterPath()
+    count = sum(len(x_data) for x_data, _ in contours)
+    if count == 0:
+        return path
+    elements = np.empty(count, dtype=[("type", ">i4"), ("x", ">f8"), ("y", ">f8")])
+    # every contour starts with a move to (0) followed by line to (1) elements
+    elements["type"] = 1
+    start = 0
+    for x_data, y_data in contours:
+        elements["type"][start] = 0
+        elements["x"][start:start + len(x_data)] = x_data
+        elements["y"][start:start + len(x_data)] = y_data
+        start += len(x_data)
+    last_start = count - len(contours[-1][0])
+    buffer = (np.array([count], dtype=">i4").tobytes() + elements.tobytes()
+              + np.array([last_start, int(Qt.FillRule.OddEvenFill.value)], dtype=">i4").tobytes())
+    QDataStream(QByteArray(buffer)) >> path
+    return path
+
+
+# static decoration of a chart drawn as one cached painter path in chart value coordinates. the item sits
+# between the qt chart grid lines and the series, the path is only mapped to the plot area while painting
+# and qt keeps the rendered pixmap until the axis range or the plot area changes
+class ChartBackgroundLayer(QGraphicsItem):
+    def __init__(self, chart_view: SmartChartView, pen: QPen):
+        super().__init__(chart_view.chart())
+        self.chart_view = chart_view
+        self.path = QPainterPath()
+        self.pen = QPen(pen)
+        # keep the pen width in pixels whatever the value to pixel scale is
+        self.pen.setCosmetic(True)
+        self.setZValue(2.5)
+        self.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
+        self.setAcceptedMouseButtons(Qt.MouseButton.NoButton)
+        self.chart_view.chart().plotAreaChanged.connect(self.updateGeometry)
+
+    def setPath(self, path: QPainterPath):
+        self.path = path
+        self.update()
+
+    def updateGeometry(self):
+        self.prepareGeometryChange()
+        self.update()
+
+    def boundingRect(self):
+        return self.chart_view.chart().plotArea()
+
+    def paint(self, painter: QPainter, option, widget=None):
+        if self.path.isEmpty():
+            return
+        painter.save()
+        painter.setClipRect(self.boundingRect())
+        painter.setTransform(self.chart_view.chart_transform.valueTransform(), True)
+        painter.setPen(self.pen)
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawPath(self.path)
+        painter.restore()
+
+    def remove(self):
+        self.chart_view.chart().plotAreaChanged.disconnect(self.updateGeometry)
+        if self.scene() is not None:
+            self.scene().removeItem(self)
+
+
 class NicholsGrid:
+    # contour levels always drawn, and the extra levels drawn once zoomed in below fine_level_span deg
+    m_levels = [0, 0.25, 0.5, 3, 6, -1, -3, -6, -12, -20]
+    m_fine_levels = [1, 2, 4, 9, 12, -0.5, -2, -4, -9, -15, -30]
+    n_levels = [1, 5, 10, 20, 30, 40, 60, 80, 100, 120, 140, 150, 160, 170, 175, 179]
+    n_fine_levels = [2, 3, 15, 25, 50, 70, 90, 110, 130, 165, 177]
+    fine_level_span = 180
+    max_density = 4
+
     def __init__(self, chart_view: SmartChartView):
         self.chart_view = chart_view
         self.chart = self.chart_view.chart()
         self.scene = self.chart_view.scene()
         self.mn_centers = self._findMNCircleCenter()
+        self.m_circle_magnitude = []
+        self.n_circle_phase = []
+        self.density = None
         self.m_circles_list = []
         self.n_circles_list = []
-        self.m_circles_series_list = []
-        self.n_circles_series_list = []
-
-    def _initMCircle(self):
-        self.m_circle_magnitude = [0, 0.25, 0.5, 3, 6, -1, -3, -6, -12, -20]
-        # create a circle data series
-        for mag in self.m_circle_magnitude:
-            m_circle = MCircle(self.chart_view, 10**(mag/20))
+        # drawn (phase, dB) contours and their levels
+        self.m_contours = []
+        self.n_contours = []
+        self.m_contour_labels = []
+        self.n_contour_labels = []
+        # every drawn contour is painted by one background layer instead of a series per contour
+        self.layer = ChartBackgroundLayer(
+            chart_view, QPen(Qt.GlobalColor.gray, 1, Qt.PenStyle.DashLine))
+        self.layout_key = None
+        self.visible = False
+        # range changes are coalesced, the grid is rebuilt once the event loop is idle
+        self.update_timer = QTimer()
+        self.update_timer.setSingleShot(True)
+        self.update_timer.setInterval(0)
+        self.update_timer.timeout.connect(self.updateGrid)
+
+    def _initMCircle(self, levels: list, density: int):
+        self.m_circle_magnitude = levels
+        self.m_circles_list = []
+        # canonical circles are shared by every grid, only the phase shift is done per chart
+        contours = getNicholsContours("m", self.m_circle_magnitude, density=density)
+        for mag, contour in zip(self.m_circle_magnitude, contours):
+            m_circle = MCircle(self.chart_view, 10**(mag/20), contour)
             self.m_circles_list.append(m_circle)
 
-    def _initNCircle(self):
-        self.n_circle_phase = [1, 5, 10, 20, 30, 40, 60,
-                               80, 100, 120, 140, 150, 160, 170, 175, 179]
-        # self.n_circle_phase = [1]
-        # create a circle data series
-        for phase in self.n_circle_phase:
-            n_circle = NCircle(self.chart_view, phase)
+    def _initNCircle(self, levels: list, density: int):
+        self.n_circle_phase = levels
+        self.n_circles_list = []
+        # canonical circles are shared by every grid, only the phase shift is done per chart
+        contours = getNicholsContours("n", self.n_circle_phase, density=density)
+        for phase, contour in zip(self.n_circle_phase, contours):
+            n_circle = NCircle(self.chart_view, phase, contour)
             self.n_circles_list.append(n_circle)
 
     def showGrid(self):
-        self._initMCircle()
-        self._initNCircle()
-        for mn_center in self.mn_centers:
-            for m_circle in self.m_circles_list:
-                phase_array = self._adjustNicholsPhase(
-                    mn_center, m_circle.angle_array)
-                new_series = QLineSeries()
-                new_series.setPen(
-                    QPen(Qt.GlobalColor.gray, 1, Qt.PenStyle.DashLine))
-                for angle, mag in zip(phase_array, m_circle.mag_array):
-                    new_series.append(angle, 20*np.log10(mag))
-                self.m_circles_series_list.append(new_series)
-                self.chart_view.addSeriestoXY(
-                    new_series, self.chart_view.x_axis, self.chart_view.y_axis)
-
-            for n_circle in self.n_circles_list:
-                new_series = QLineSeries()
-                angle_arr = self._adjustNicholsPhase(
-                    mn_center, np.array(n_circle.angle_array))
-                for angle, mag in zip(angle_arr, n_circle.mag_array):
-                    new_series.append(angle, 20*np.log10(mag))
-                points = new_series.points()
-                points.sort(key=lambda point: (point.x(), point.y()))
-                new_series = QLineSeries()
-                new_series.setPen(
-                    QPen(Qt.GlobalColor.gray, 1, Qt.PenStyle.DashLine))
-                for point in points:
-                    new_series.append(point)
-                self.n_circles_series_list.append(new_series)
-                self.chart_view.addSeriestoXY(
-                    new_series, self.chart_view.x_axis, self.chart_view.y_axis)
+        self.visible = True
+        self.updateGrid()
+
+    # rebuild the grid for the current axis ranges on the next event loop pass
+    def scheduleUpdate(self):
+        if self.visible:
+            self.update_timer.start()
+
+    # choose the contour levels, sampling density and the contours that reach into the visible window,
+    # the layer path is only rebuilt when that selection changes
+    def updateGrid(self):
+        if not self.visible:
+            return
+        x_min, x_max = self.chart_view.x_axis.min(), self.chart_view.x_axis.max()
+        y_min, y_max = self.chart_view.y_axis.min(), self.chart_view.y_axis.max()
+        x_span = max(x_max - x_min, 1e-9)
+        # finer circle sampling when zoomed in, every n-th point when several periods are visible
+        density = int(np.clip(2**np.ceil(np.log2(360/x_span)), 1, self.max_density))
+        stride = max(1, int(x_span // 720))
+        fine = x_span <= self.fine_level_span
+        m_levels = self.m_levels + (self.m_fine_levels if fine else [])
+        n_levels = self.n_levels + (self.n_fine_levels if fine else [])
+        if (m_levels, density) != (self.m_circle_magnitude, self.density):
+            self._initMCircle(m_levels, density)
+        if (n_levels, density) != (self.n_circle_phase, self.density):
+            self._initNCircle(n_levels, density)
+        self.density = density
+
+        self.mn_centers = self._findMNCircleCenter()
+        visible_m = self._visibleContours(self.m_circles_list, x_min, x_max, y_min, y_max)
+        visible_n = self._visibleContours(self.n_circles_list, x_min, x_max, y_min, y_max)
+        layout_key = (density, stride, tuple(m_levels), tuple(n_levels), tuple(visible_m), tuple(visible_n))
+        if layout_key == self.layout_key:
+            return
+        self.layout_key = layout_key
+
+        self.m_contours = []
+        self.m_contour_labels = []
+        for index, offset in visible_m:
+            m_circle = self.m_circles_list[index]
+            self.m_contours.append(
+                (m_circle.angle_array[::stride] + offset, 20*np.log10(m_circle.mag_array[::stride])))
+            self.m_contour_labels.append(self.m_circle_magnitude[index])
+
+        self.n_contours = []
+        self.n_contour_labels = []
+        for index, offset in visible_n:
+            n_circle = self.n_circles_list[index]
+            angle_arr = n_circle.angle_array + offset
+            mag_db = 20*np.log10(n_circle.mag_array)
+            # n circles are drawn in (phase, magnitude) order
+            order = np.lexsort((mag_db, angle_arr))[::stride]
+            self.n_contours.append((angle_arr[order], mag_db[order]))
+            self.n_contour_labels.append(self.n_circle_phase[index])
+        self.layer.setPath(_contoursToPath(self.m_contours + self.n_contours))
+
+    # (contour index, phase offset) of every shifted contour whose bounding box meets the window
+    def _visibleContours(self, circles: list, x_min: float, x_max: float, y_min: float, y_max: float):
+        visible = []
+        for index, circle in enumerate(circles):
+            min_phase, max_phase = circle.angle_array.min(), circle.angle_array.max()
+            if 20*np.log10(np.max(circle.mag_array)) < y_min or 20*np.log10(np.min(circle.mag_array)) > y_max:
+                continue
+            # neighbouring centers may shift a wide contour to the same place
+            offsets = {float(_nicholsPhaseOffset(center, min_phase, max_phase)) for center in self.mn_centers}
+            for offset in sorted(offsets):
+                if min_phase + offset <= x_max and max_phase + offset >= x_min:
+                    visible.append((index, offset))
+        return visible
 
     def hideGrid(self):
-        for series in self.m_circles_series_list:
-            self.chart_view.chart().removeSeries(series)
-        for series in self.n_circles_series_list:
-            self.chart_view.chart().removeSeries(series)
-        self.m_circles_series_list = []
-        self.n_circles_series_list = []
+        self.visible = False
+        self.update_timer.stop()
+        self.layer.remove()
+        self.layout_key = None
+        self.m_contours = []
+        self.n_contours = []
+        self.m_contour_labels = []
+        self.n_contour_labels = []
         self.m_circles_list = []
         self.n_circles_list = []
 
+    # closed loop magnitude (dB) and phase (deg, mod 180 like the n circle labels) at the chart point, each
+    # snapped to the nearest drawn contour level. a level is used only if its contour is estimated to lie
+    # within tolerance (chart units) of the point from the local gradient, otherwise None is returned
+    def closedLoopReadout(self, point: QPointF, tolerance: float):
+        phase, mag_db = point.x(), point.y()
+        step = 1e-3 * max(tolerance, 1e-9)
+        closed_loop = nicholsClosedLoop(
+            np.array([phase, phase + step, phase - step, phase, phase]),
+            np.array([mag_db, mag_db, mag_db, mag_db + step, mag_db - step]))
+        if not np.all(np.isfinite(closed_loop)) or np.any(closed_loop == 0):
+            return None, None
+        # both readouts change smoothly, the gradient gives the distance to the level in chart units
+        with np.errstate(divide="ignore"):
+            m_value = 20*np.log10(np.abs(closed_loop[0]))
+            m_gradient = np.hypot(20*np.log10(np.abs(closed_loop[1]/closed_loop[2])),
+                                  20*np.log10(np.abs(closed_loop[3]/closed_loop[4]))) / (2*step)
+        n_value = np.angle(closed_loop[0], deg=True) % 180
+        n_gradient = np.hypot(np.angle(closed_loop[1]/closed_loop[2], deg=True),
+                              np.angle(closed_loop[3]/closed_loop[4], deg=True)) / (2*step)
+
+        dB_label = None
+        if len(self.m_circles_list) > 0:
+            levels = np.array(self.m_circle_magnitude, dtype=np.float64)
+            nearest = np.argmin(np.abs(levels - m_value))
+            if np.abs(levels[nearest] - m_value) <= tolerance * m_gradient:
+                dB_label = self.m_circle_magnitude[nearest]
+        deg_label = None
+        if len(self.n_circles_list) > 0:
+            levels = np.array(self.n_circle_phase, dtype=np.float64)
+            difference = np.abs((levels - n_value + 90) % 180 - 90)
+            nearest = np.argmin(difference)
+            if difference[nearest] <= tolerance * n_gradient:
+                deg_label = self.n_circle_phase[nearest]
+        return dB_label, deg_label
+
     def hideText(self):
         self.chart_view.nichols_grid_text = False
 
@@ -2108,110 +3441,53 @@ class NicholsGrid:
         self.chart_view.nichols_grid_text = True
 
     def _findMNCircleCenter(self):
-        # determine if -180,180,180+360,-180-360 is in the current x range
-        center = []
-        for multiple in range(-10, 11):
-            if -180 + multiple * 360 >= self.chart_view.x_axis.min() and -180 + multiple * 360 <= self.chart_view.x_axis.max():
-                center.append(-180 + multiple * 360)
-        if center != []:
-            center.append(min(center)-360)
-            center.append(max(center)+360)
-        return center
+        # every -180+k*360 center whose contours can reach into the current x range
+        x_min, x_max = self.chart_view.x_axis.min(), self.chart_view.x_axis.max()
+        first = max(int(np.floor((x_min - 360)/360)), -10)
+        last = min(int(np.floor((x_max + 720)/360)) + 1, 11)
+        return [-180 + multiple * 360 for multiple in range(first, last)]
 
     def _adjustNicholsPhase(self, center, phase_array: np.ndarray):
         # adjust the phase array by adding 360 or minusing 360 to make sure the center is in the array
-        min_phase = min(phase_array)
-        max_phase = max(phase_array)
-        while min_phase - center >= 180:
-            phase_array -= 360
-            min_phase = min(phase_array)
-        while max_phase - center <= -180:
-            phase_array += 360
-            max_phase = max(phase_array)
-        return phase_array
+        return shiftNicholsPhase(center, phase_array)
 
 
 class MCircle:
-    def __init__(self, chart_view: SmartChartView, magnitude: float):
+    def __init__(self, chart_view: SmartChartView, magnitude: float, contour: tuple = None):
         super().__init__()
         self.magnitude = magnitude
         self.chart_view = chart_view
         self.angle_array, self.mag_array, self.center, self.radius = self.calculateCircle(
-            magnitude)
+            magnitude, contour)
 
-    def calculateCircle(self, magnitude: float):
-        angle_array = []
-        mag_array = []
+    def calculateCircle(self, magnitude: float, contour: tuple = None):
+        if contour is None:
+            contour = calculateMContours([magnitude])[0]
+        angle_array, mag_array = contour
         if magnitude == 1:
-            iter_array = np.concatenate(
-                (np.arange(-100, -5, 1), np.arange(-5, 5, .01), np.arange(5, 100, 1)))
-            for y in iter_array:
-                angle = np.angle(-1/2+y*1j, deg=True)
-                mag = np.abs(-1/2+y*1j)
-                angle_array.append(angle)
-                mag_array.append(mag)
-                angle_array_ndarray = np.unwrap(
-                    angle_array, period=360, discont=180)
-            return angle_array_ndarray, mag_array, QPointF(-1/2, 0), 0
+            return angle_array, mag_array, QPointF(-1/2, 0), 0
         # center of M circle
         center = QPointF(-magnitude**2/(magnitude**2-1), 0)
         # radius of M circle
         radius = np.sqrt(magnitude**2/(magnitude**2-1)**2)
-
-        # create a circle data series
-        iter_array = np.concatenate(
-            (np.arange(0, 10, .1), np.arange(10, 350, 1), np.arange(350, 360, 0.1)))
-
-        for i in iter_array:
-            x = center.x() + radius * math.cos(math.radians(i))
-            y = center.y() + radius * math.sin(math.radians(i))
-            mag = np.abs(x+y*1j)
-            angle = np.angle(x+y*1j, deg=True)
-            angle_array.append(angle)
-            mag_array.append(mag)
-
-        angle_array = np.unwrap(angle_array, period=360, discont=180)
-
         return angle_array, mag_array, center, radius
 
 
 class NCircle:
-    def __init__(self, chart_view: SmartChartView, phase: float):
+    def __init__(self, chart_view: SmartChartView, phase: float, contour: tuple = None):
         super().__init__()
         self.phase = phase
         self.chart_view = chart_view
         self.angle_array, self.mag_array, self.center, self.radius = self.calculateCircle(
-            phase)
+            phase, contour)
 
-    def calculateCircle(self, alpha: float):
+    def calculateCircle(self, alpha: float, contour: tuple = None):
         N = np.tan(alpha/180*np.pi)
         center = QPointF(-1/2, 1/(2*N))
         radius = np.sqrt(1/4+(1/(2*N))**2)
-        angle_array = []
-        mag_array = []
-        iter_array = np.concatenate(
-            (np.arange(0, 5, .1), np.arange(5, 355, 1), np.arange(355, 360, 0.1)))
-        for i in iter_array:
-            if i == 270:
-                continue
-            x = center.x() + radius * math.cos(math.radians(i))
-            y = center.y() + radius * math.sin(math.radians(i))
-            mag = np.abs(x+y*1j)
-            angle = np.angle(x+y*1j, deg=True)
-            if mag == 0 and angle == 0:
-                continue
-            if 20*np.log10(mag) < -40:
-                continue
-            angle_array.append(angle)
-            mag_array.append(mag)
-        # mag_array,angle_array= self._removePhaseData(mag_array,angle_array)
-        # mag_array1,mag_array2,angle_array1,angle_array2 = self._partitionPhaseData(mag_array,angle_array)
-        angle_array = list(np.unwrap(angle_array, period=360, discont=180))
-        angle_array.append(min(angle_array)-0.1)
-        mag_array.append(10**(-1000/20))
-        angle_array.append(max(angle_array)+0.1)
-        mag_array.append(10**(-1000/20))
-
+        if contour is None:
+            contour = calculateNContours([alpha])[0]
+        angle_array, mag_array = contour
         return angle_array, mag_array, center, radius
 
     def _removePhaseData(self, mag_array: list, angle_array: list):